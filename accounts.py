@@ -1,7 +1,44 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 import database as db
-from theme import create_styled_treeview, create_labelframe
+from theme import TableBinding, create_styled_treeview, create_labelframe
+
+
+class BudgetSummary:
+    """Category totals against their budgets, drawn into tree. Holds no
+    widgets of its own, so it can draw into a stand-in without a display."""
+    
+    def __init__(self, tree):
+        self.tree = tree
+        self.binding = TableBinding(tree)
+    
+    def calculate_totals(self):
+        return db.get_category_summary()
+    
+    def load_data(self):
+        data = self.calculate_totals()
+        rows = []
+        
+        for category, amount, budget in data:
+            display_amount = abs(amount) if amount < 0 else amount
+            display_amount = f"${display_amount:,.2f}"
+            
+            if budget == 'None':
+                display_budget = '-'
+                status = '-'
+                row_tag = 'no_budget'
+            else:
+                display_budget = f"${float(budget):,.2f}"
+                if abs(amount) < float(budget):
+                    status = 'Within Budget'
+                    row_tag = 'within'
+                else:
+                    status = 'OVER BUDGET'
+                    row_tag = 'over'
+            
+            rows.append((category, display_amount, display_budget, status))
+        
+        self.binding.render(rows)
 
 
 class Accounts(ttk.Frame):
@@ -25,6 +62,7 @@ class Accounts(ttk.Frame):
         widths = (200, 120, 120, 100)
         tree_frame, self.tree = create_styled_treeview(main_container, columns, widths)
         tree_frame.pack(fill=BOTH, expand=True)
+        self.summary = BudgetSummary(self.tree)
         
         self.tree.tag_configure('over', foreground='#d9534f')
         self.tree.tag_configure('within', foreground='#02b875')
@@ -33,68 +71,10 @@ class Accounts(ttk.Frame):
         self.load_data()
     
     def calculate_totals(self):
-        all_transactions = db.get_all_transactions()
-        all_categories = db.get_all_categories_with_budget()
-        
-        if not all_transactions:
-            return None
-        
-        cat_totals = {}
-        
-        cat_totals["Please Select"] = [0.0, 'None']
-        
-        for cat, budget in all_categories:
-            if cat not in cat_totals:
-                cat_totals[cat] = [0.0, budget]
-        
-        for amount, category in all_transactions:
-            if category not in cat_totals:
-                cat_totals[category] = [0.0, 'None']
-            
-            try:
-                if category == "Please Select":
-                    cat_totals[category][0] += abs(float(amount))
-                else:
-                    cat_totals[category][0] += float(amount)
-            except (ValueError, TypeError):
-                pass
-        
-        if "Please Select" in cat_totals:
-            cat_totals['Uncategorized'] = cat_totals.pop('Please Select')
-        
-        return dict(sorted(cat_totals.items()))
+        return self.summary.calculate_totals()
     
     def load_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        data = self.calculate_totals()
-        
-        if not data:
-            return
-        
-        for i, (category, values) in enumerate(data.items()):
-            amount = values[0]
-            budget = values[1]
-            
-            display_amount = abs(amount) if amount < 0 else amount
-            display_amount = f"${display_amount:,.2f}"
-            
-            if budget == 'None':
-                display_budget = '-'
-                status = '-'
-                row_tag = 'no_budget'
-            else:
-                display_budget = f"${float(budget):,.2f}"
-                if abs(amount) < float(budget):
-                    status = 'Within Budget'
-                    row_tag = 'within'
-                else:
-                    status = 'OVER BUDGET'
-                    row_tag = 'over'
-            
-            base_tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert('', 'end', values=(category, display_amount, display_budget, status), tags=(base_tag,))
+        self.summary.load_data()
     
     def refresh(self):
         self.load_data()
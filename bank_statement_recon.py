@@ -1,36 +1,161 @@
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox
-from dateutil import parser
 import database as db
-from theme import create_styled_treeview, create_button, create_entry, create_label, create_labelframe, create_combobox
+from dates import PERIODS, period_range
+from theme import create_virtual_treeview, create_button, create_entry, create_label, create_labelframe, create_combobox
 from bank_import import add_bank_statement
-from category_rules import auto_apply_rules
+from statement_import import auto_apply_rules
 
 
-def date_changer(date, date_format=None):
-    try:
-        if date_format == 'display':
-            return str(parser.parse(date).strftime('%Y-%m-%d'))
-        else:
-            return parser.parse(date).strftime('%Y%m%d')
-    except (OverflowError, ValueError):
-        return date
+SEARCH_DELAY_MS = 250
+
+
+class StatementRows:
+    """The rows of the Transactions tab: one account's transactions,
+    searched, filtered and sorted in the database. Holds no widgets, so it
+    can feed a VirtualTable without a display."""
+    
+    def __init__(self, account_name):
+        self.account_name = account_name
+        self.search_text = ''
+        self.filters = {}
+        self.sort_column = None
+        self.sort_descending = False
+        # Every match of a ranked search, when ranking left some out.
+        self.matches = 0
+    
+    def ranked(self):
+        """Whether rows are search results in order of relevance, which is
+        the order until a column heading is clicked."""
+        return bool(self.search_text) and self.sort_column is None
+    
+    def order_by(self):
+        return self.sort_column or 'date'
+    
+    def query_filters(self):
+        return dict(self.filters, text=self.search_text)
+    
+    def count_rows(self):
+        self.matches = 0
+        if self.ranked():
+            count = db.count_search_results(self.search_text, self.account_name, self.filters)
+            if count >= db.SEARCH_LIMIT:
+                self.matches = db.count_transactions(self.account_name, self.query_filters())
+            return count
+        return db.count_transactions(self.account_name, self.query_filters())
+    
+    def fetch_rows(self, after, limit, offset):
+        if self.ranked():
+            # Ranked results have no keyset key, so they page by offset.
+            rows = db.search_transactions(self.search_text, self.account_name, limit, offset, self.filters)
+            return [(row[0],) + tuple(row[2:]) for row in rows]
+        return db.query_transactions(
+            self.account_name,
+            self.query_filters(),
+            self.order_by(),
+            self.sort_descending,
+            after,
+            limit,
+            offset
+        )
+    
+    def row_key(self, row):
+        if self.ranked():
+            return None
+        return db.transaction_key(row, self.order_by())
+    
+    def row_values(self, record):
+        return (
+            record[0],
+            db.format_date(record[1]),
+            record[2],
+            db.format_amount(record[3]),
+            record[4]
+        )
 
 
 class BankStatementRecon(ttk.Frame):
+    """Transactions tab for one bank account.
+    
+    The tab starts out empty; its widgets are built and its rows loaded the
+    first time refresh() is called, i.e. when the tab is first selected."""
+    
     def __init__(self, parent, account_name, *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
         
         self.account_name = account_name
+        self.built = False
+        self.search_job = None
+        self.rows = StatementRows(account_name)
+    
+    def build(self):
+        self.built = True
         
         main_container = ttk.Frame(self, padding=20)
         main_container.pack(fill=BOTH, expand=True)
         
-        columns = ("ID", "Date", "Description", "Amount", "Category")
+        search_frame = ttk.Frame(main_container)
+        search_frame.pack(fill=X, pady=(0, 10))
+        
+        create_label(search_frame, text="Search:").pack(side=LEFT, padx=(0, 5))
+        self.search_entry = create_entry(search_frame, width=40)
+        self.search_entry.pack(side=LEFT)
+        self.search_entry.bind('<KeyRelease>', lambda e: self.schedule_search())
+        
+        create_label(search_frame, text="Period:").pack(side=LEFT, padx=(20, 5))
+        self.period_combo = create_combobox(search_frame, values=PERIODS, width=14, state='readonly')
+        self.period_combo.pack(side=LEFT)
+        self.period_combo.set(PERIODS[0])
+        self.period_combo.bind('<<ComboboxSelected>>', lambda e: self.select_period())
+        
+        self.search_status = create_label(search_frame, text="")
+        self.search_status.pack(side=LEFT, padx=(20, 0))
+        
+        filter_frame = ttk.Frame(main_container)
+        filter_frame.pack(fill=X, pady=(0, 10))
+        
+        create_label(filter_frame, text="From:").pack(side=LEFT, padx=(0, 5))
+        self.from_entry = create_entry(filter_frame, width=12)
+        self.from_entry.pack(side=LEFT, padx=(0, 10))
+        
+        create_label(filter_frame, text="To:").pack(side=LEFT, padx=(0, 5))
+        self.to_entry = create_entry(filter_frame, width=12)
+        self.to_entry.pack(side=LEFT, padx=(0, 10))
+        
+        create_label(filter_frame, text="Min Amount:").pack(side=LEFT, padx=(0, 5))
+        self.min_entry = create_entry(filter_frame, width=10)
+        self.min_entry.pack(side=LEFT, padx=(0, 10))
+        
+        create_label(filter_frame, text="Max Amount:").pack(side=LEFT, padx=(0, 5))
+        self.max_entry = create_entry(filter_frame, width=10)
+        self.max_entry.pack(side=LEFT, padx=(0, 10))
+        
+        create_label(filter_frame, text="Category:").pack(side=LEFT, padx=(0, 5))
+        self.filter_category_combo = create_combobox(filter_frame, width=18)
+        self.filter_category_combo.pack(side=LEFT, padx=(0, 10))
+        self.filter_category_combo.bind('<Button-1>', lambda e: self.update_filter_category_options())
+        
+        for entry in (self.from_entry, self.to_entry, self.min_entry, self.max_entry, self.filter_category_combo):
+            entry.bind('<Return>', lambda e: self.apply_filters())
+        
+        create_button(filter_frame, text="Filter", command=self.apply_filters, bootstyle="info").pack(side=LEFT, padx=5)
+        create_button(filter_frame, text="Clear Filters", command=self.clear_filters, bootstyle="secondary").pack(side=LEFT, padx=5)
+        
+        self.columns = ("ID", "Date", "Description", "Amount", "Category")
         widths = (50, 100, 250, 100, 150)
-        tree_frame, self.tree = create_styled_treeview(main_container, columns, widths)
-        tree_frame.pack(fill=BOTH, expand=True, pady=(0, 20))
+        self.table = create_virtual_treeview(
+            main_container, self.columns, widths,
+            count_rows=self.count_rows,
+            fetch_rows=self.rows.fetch_rows,
+            row_values=self.rows.row_values,
+            row_key=self.rows.row_key
+        )
+        self.table.pack(fill=BOTH, expand=True, pady=(0, 20))
+        self.tree = self.table.tree
+        
+        for heading, column in zip(self.columns, db.TRANSACTION_COLUMNS):
+            self.tree.heading(heading, command=lambda column=column: self.sort_by(column))
         
         data_frame = create_labelframe(main_container, text="Transaction Details")
         data_frame.pack(fill=X, pady=(0, 15))
@@ -74,32 +199,88 @@ class BankStatementRecon(ttk.Frame):
         create_button(button_frame, text="Clear", command=self.clear_entries, bootstyle="secondary").pack(side=LEFT, padx=5)
         
         self.tree.bind("<ButtonRelease-1>", self.select_record)
-        
-        self.load_data()
-        auto_apply_rules(account_name)
     
     def update_category_options(self):
         self.category_combo['values'] = db.get_categories()
     
     def load_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.table.refresh()
+    
+    def update_filter_category_options(self):
+        self.filter_category_combo['values'] = ('', 'Please Select') + db.get_categories()
+    
+    def count_rows(self):
+        count = self.rows.count_rows()
+        text = ''
+        if self.rows.matches > count:
+            # Sorting by a column lists every match.
+            text = f"Best matches among the newest {count} of {self.rows.matches}; click a heading to list all"
+        self.search_status.config(text=text)
+        return count
+    
+    def sort_by(self, column):
+        rows = self.rows
+        if column == rows.sort_column:
+            rows.sort_descending = not rows.sort_descending
+        else:
+            rows.sort_column = column
+            rows.sort_descending = False
         
-        records = db.get_bank_statement_data(self.account_name)
+        for heading, name in zip(self.columns, db.TRANSACTION_COLUMNS):
+            arrow = (' ▼' if rows.sort_descending else ' ▲') if name == rows.sort_column else ''
+            self.tree.heading(heading, text=heading + arrow)
+        self.table.refresh(top=True)
+    
+    def select_period(self):
+        first, last = period_range(self.period_combo.get())
+        for entry, value in ((self.from_entry, first), (self.to_entry, last)):
+            entry.delete(0, END)
+            entry.insert(0, value)
+        self.apply_filters()
+    
+    def apply_filters(self):
+        filters = {
+            'date_from': self.from_entry.get().strip(),
+            'date_to': self.to_entry.get().strip(),
+            'amount_min': self.min_entry.get().strip(),
+            'amount_max': self.max_entry.get().strip(),
+            'category': self.filter_category_combo.get().strip(),
+        }
+        try:
+            db.transaction_filters(filters)
+        except ValueError as error:
+            messagebox.showerror('Error', str(error))
+            return
         
-        for i, record in enumerate(records):
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert('', 'end', values=(
-                record[0],
-                date_changer(record[1], 'display'),
-                record[2],
-                record[3],
-                record[4]
-            ), tags=(tag,))
+        self.rows.filters = filters
+        self.table.refresh(top=True)
+    
+    def clear_filters(self):
+        for entry in (self.from_entry, self.to_entry, self.min_entry, self.max_entry):
+            entry.delete(0, END)
+        self.filter_category_combo.set('')
+        self.period_combo.set(PERIODS[0])
+        self.rows.filters = {}
+        self.table.refresh(top=True)
+    
+    def schedule_search(self):
+        """Search once typing pauses rather than on every key."""
+        if self.search_job:
+            self.after_cancel(self.search_job)
+        self.search_job = self.after(SEARCH_DELAY_MS, self.search)
+    
+    def search(self):
+        self.search_job = None
+        text = self.search_entry.get().strip()
+        if not db.search_query(text):
+            # Nothing searchable, e.g. only punctuation: show every row.
+            text = ''
+        if text != self.rows.search_text:
+            self.rows.search_text = text
+            self.table.refresh(top=True)
     
     def import_statement(self):
-        add_bank_statement(self.account_name)
-        self.load_data()
+        add_bank_statement(self, self.account_name, on_done=self.load_data)
     
     def add_record(self):
         try:
@@ -119,7 +300,7 @@ class BankStatementRecon(ttk.Frame):
             
             db.add_transaction(
                 self.account_name,
-                date_changer(date),
+                date,
                 desc,
                 amount,
                 category
@@ -142,7 +323,7 @@ class BankStatementRecon(ttk.Frame):
             
             db.update_transaction(
                 self.account_name,
-                date_changer(self.date_entry.get()),
+                self.date_entry.get(),
                 self.desc_entry.get(),
                 self.amount_entry.get(),
                 category,
@@ -231,5 +412,12 @@ class BankStatementRecon(ttk.Frame):
         self.category_combo.set('')
     
     def refresh(self):
+        if not self.built:
+            self.build()
         auto_apply_rules(self.account_name)
         self.load_data()
+    
+    def release(self):
+        """Drop the loaded rows while the tab is not visible."""
+        if self.built:
+            self.table.release()
@@ -0,0 +1,160 @@
+import os
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from tkinter import messagebox
+from tkinter.filedialog import askdirectory, askopenfilenames
+import database as db
+from jobs import run_job
+from statement_import import get_csv_columns, guess_account, import_statement_files
+from statement_parsers import find_statements, statement_type
+from theme import TableBinding, create_styled_treeview, create_button, create_label, create_combobox
+
+
+def choose_statement_files():
+    files = askopenfilenames(
+        title='Select Bank Statements',
+        initialdir='/',
+        filetypes=(('Bank statements', '*.csv *.ofx *.qfx'), ('CSV files', '*.csv'), ('OFX files', '*.ofx *.qfx'))
+    )
+    return list(files)
+
+
+def choose_statement_folder():
+    folder = askdirectory(title='Select Folder of Bank Statements', initialdir='/')
+    return find_statements(folder) if folder else []
+
+
+class BatchImportDialog(ttk.Toplevel):
+    """Lists statement files with the account each will be imported into.
+    Accounts are guessed from file and folder names and can be changed for
+    the selected files before importing."""
+    
+    def __init__(self, parent, files, on_done=None):
+        super().__init__(parent.winfo_toplevel())
+        self.title("Import Bank Statements")
+        self.geometry("700x450")
+        self.transient(parent.winfo_toplevel())
+        self.grab_set()
+        
+        self.parent = parent
+        self.on_done = on_done
+        self.accounts = [acc[0] for acc in db.get_bank_accounts()]
+        self.statements = [[file, guess_account(file, self.accounts) or ''] for file in files]
+        
+        frame = ttk.Frame(self, padding=20)
+        frame.pack(fill=BOTH, expand=True)
+        
+        columns = ("File", "Account")
+        widths = (450, 180)
+        tree_frame, self.tree = create_styled_treeview(frame, columns, widths)
+        tree_frame.pack(fill=BOTH, expand=True, pady=(0, 15))
+        self.tree.configure(selectmode='extended')
+        self.binding = TableBinding(self.tree, row_values=lambda row: row[1:])
+        
+        assign_frame = ttk.Frame(frame)
+        assign_frame.pack(fill=X, pady=(0, 15))
+        
+        create_label(assign_frame, text="Account:").pack(side=LEFT, padx=(0, 5))
+        self.account_combo = create_combobox(assign_frame, values=self.accounts, width=25, state='readonly')
+        self.account_combo.pack(side=LEFT, padx=(0, 10))
+        create_button(assign_frame, text="Assign to Selected", command=self.assign_account, bootstyle="info").pack(side=LEFT)
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=X)
+        
+        create_button(button_frame, text="Import", command=self.start_import, bootstyle="success").pack(side=LEFT, padx=5)
+        create_button(button_frame, text="Cancel", command=self.destroy, bootstyle="secondary").pack(side=LEFT, padx=5)
+        
+        self.load_data()
+    
+    def load_data(self):
+        self.binding.render(
+            (i, os.path.basename(file), account or '-')
+            for i, (file, account) in enumerate(self.statements)
+        )
+    
+    def assign_account(self):
+        account = self.account_combo.get()
+        if not account:
+            messagebox.showwarning('Required', 'Choose an account first', parent=self)
+            return
+        
+        for iid in self.tree.selection():
+            self.statements[int(iid)][1] = account
+        self.load_data()
+    
+    def start_import(self):
+        if any(not account for file, account in self.statements):
+            messagebox.showwarning('Required', 'Assign an account to every file', parent=self)
+            return
+        
+        csv_columns = None
+        if any(statement_type(file) == 'csv' for file, account in self.statements):
+            try:
+                csv_columns = get_csv_columns()
+            except Exception as error:
+                messagebox.showerror('Error', str(error), parent=self)
+                return
+        
+        statements = [tuple(statement) for statement in self.statements]
+        parent, on_done = self.parent, self.on_done
+        self.grab_release()
+        self.destroy()
+        
+        def finished(summary):
+            ImportSummary(parent, summary)
+            if on_done:
+                on_done()
+        
+        run_job(
+            parent,
+            'Importing statements',
+            lambda job: import_statement_files(statements, csv_columns, job),
+            on_done=finished
+        )
+
+
+class ImportSummary(ttk.Toplevel):
+    """Per-file results of a batch import."""
+    
+    def __init__(self, parent, summary):
+        super().__init__(parent.winfo_toplevel())
+        self.title("Import Summary")
+        self.geometry("800x450")
+        self.transient(parent.winfo_toplevel())
+        
+        frame = ttk.Frame(self, padding=20)
+        frame.pack(fill=BOTH, expand=True)
+        
+        added = sum(row[2] for row in summary)
+        skipped = sum(row[3] for row in summary)
+        failed = sum(1 for row in summary if row[4])
+        create_label(
+            frame,
+            text=f"Added {added} new transactions ({skipped} skipped) from {len(summary) - failed} of {len(summary)} files"
+        ).pack(anchor=W, pady=(0, 10))
+        
+        columns = ("File", "Account", "Added", "Skipped", "Result")
+        widths = (260, 140, 70, 70, 220)
+        tree_frame, tree = create_styled_treeview(frame, columns, widths)
+        tree_frame.pack(fill=BOTH, expand=True, pady=(0, 15))
+        tree.tag_configure('failed', foreground='#d9534f')
+        
+        TableBinding(
+            tree,
+            row_values=lambda row: row[1:],
+            row_tags=lambda i, row: ('evenrow' if i % 2 == 0 else 'oddrow',) + (('failed',) if summary[i][4] else ())
+        ).render(
+            (i, os.path.basename(file), account, added_count, skipped_count, 'Imported')
+            if not error else (i, os.path.basename(file), account, '-', '-', error)
+            for i, (file, account, added_count, skipped_count, error) in enumerate(summary)
+        )
+        
+        create_button(frame, text="Close", command=self.destroy, bootstyle="secondary").pack()
+
+
+def batch_import(parent, files, on_done=None):
+    if not files:
+        messagebox.showinfo('Cancelled', 'No statements selected')
+        return
+    BatchImportDialog(parent, files, on_done)
@@ -0,0 +1,2 @@
+"""Performance harnesses for the expense tracker. Run each module with
+``python -m benchmarks.<name>`` from the project root."""
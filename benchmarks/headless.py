@@ -0,0 +1,126 @@
+"""Stand-ins that let the benchmarks run without a display.
+
+Dialogs are replaced for the duration of stub_dialogs(). Without a
+display, views are replaced by their Tk-free parts, built through their
+own constructors with a StubTree and StubScrollbar as the widgets."""
+from collections import OrderedDict
+from contextlib import contextmanager
+from unittest import mock
+
+
+class StubTree:
+    """The parts of ttk.Treeview that TableBinding and VirtualTable use,
+    keeping the items in a dict."""
+    
+    def __init__(self):
+        self.items = OrderedDict()
+    
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self.items[iid] = (values, tags)
+        return iid
+    
+    def item(self, iid, values=(), tags=()):
+        self.items[iid] = (values, tags)
+    
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+    
+    def move(self, iid, parent, index):
+        pass
+    
+    def get_children(self, item=''):
+        return tuple(self.items)
+    
+    def yview_moveto(self, fraction):
+        pass
+    
+    def bind(self, sequence, func):
+        pass
+
+
+class StubScrollbar:
+    def set(self, first, last):
+        pass
+
+
+class StubMessagebox:
+    """Answers every question with yes and raises on showerror, so a
+    failing import fails the benchmark instead of being counted."""
+    
+    def __init__(self):
+        self.shown = []
+    
+    def showinfo(self, title, message, **options):
+        self.shown.append((title, message))
+    
+    showwarning = showinfo
+    
+    def showerror(self, title, message, **options):
+        raise RuntimeError(f"{title}: {message}")
+    
+    def askyesno(self, title, message, **options):
+        return True
+
+
+def run_job_now(parent, title, work, on_done=None, on_error=None):
+    """run_job without the progress dialog or the worker thread."""
+    from jobs import Job
+    result = work(Job())
+    if on_done:
+        on_done(result)
+    return result
+
+
+@contextmanager
+def stub_dialogs(file=None):
+    """Replace the file picker, message boxes and job dialog used by
+    bank_import. The file picker returns file."""
+    import bank_import
+    messages = StubMessagebox()
+    with mock.patch.object(bank_import, 'askopenfilename', lambda **options: file), \
+            mock.patch.object(bank_import, 'messagebox', messages), \
+            mock.patch.object(bank_import, 'run_job', run_job_now):
+        yield messages
+
+
+def display_available():
+    import tkinter
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError:
+        return False
+    root.destroy()
+    return True
+
+
+def statement_table(account_name, root=None):
+    """The table of a BankStatementRecon for account_name, ready for
+    refresh(): the real widget with root, or without it a VirtualTable
+    drawing into a StubTree."""
+    from bank_statement_recon import BankStatementRecon, StatementRows
+    from theme import VirtualTable
+    
+    if root is not None:
+        view = BankStatementRecon(root, account_name)
+        view.build()
+        return view.table
+    
+    rows = StatementRows(account_name)
+    return VirtualTable(
+        StubTree(), StubScrollbar(),
+        count_rows=rows.count_rows,
+        fetch_rows=rows.fetch_rows,
+        row_values=rows.row_values,
+        row_key=rows.row_key
+    )
+
+
+def accounts_view(root=None):
+    """The Budget Summary, as a real widget with root or as a
+    BudgetSummary drawing into a StubTree without."""
+    from accounts import Accounts, BudgetSummary
+    
+    if root is not None:
+        return Accounts(root)
+    return BudgetSummary(StubTree())
@@ -0,0 +1,136 @@
+"""Cold-start timing for ExpenseTrackerApp.
+    
+    python -m benchmarks.startup [--database PATH] [--runs N] [--budget-ms MS]
+
+Each run starts a fresh interpreter. The import phase is measured with
+``-X importtime`` on ``import main`` and must not load any of the
+dependencies that are only needed to import statements. Time to first
+frame is measured from process start until the main window has been drawn
+once; it needs a display and is skipped without one. The command exits
+non-zero when a lazy dependency is imported at startup or the median time
+exceeds the budget."""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = ('pandas', 'ofxtools', 'dateutil')
+
+DEFAULT_BUDGET_MS = 1000
+
+FIRST_FRAME_PROBE = """
+import sys
+import time
+import database as db
+db.configure(database_file=sys.argv[1])
+from main import ExpenseTrackerApp
+app = ExpenseTrackerApp()
+app.root.update_idletasks()
+app.root.update()
+print(time.time())
+app.root.destroy()
+"""
+
+
+def parse_importtime(output):
+    """Map each module in -X importtime output to its cumulative time in ms."""
+    modules = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = int(fields[1]) / 1000
+    return modules
+
+
+def measure_imports():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr)
+
+
+def measure_first_frame(database_file):
+    """Milliseconds from process start to the first drawn frame, or None
+    when no display is available."""
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_FRAME_PROBE, database_file],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        if 'TclError' in result.stderr:
+            return None
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return (float(result.stdout.split()[-1]) - start) * 1000
+
+
+def run(database_file=None, runs=3):
+    """Time `runs` cold starts against a scratch copy of database_file (or
+    an empty database) and return a report dict."""
+    import_times = []
+    frame_times = []
+    loaded = set()
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        for i in range(runs):
+            probe_file = os.path.join(scratch, f'startup{i}.db')
+            if database_file:
+                shutil.copy(database_file, probe_file)
+            
+            modules = measure_imports()
+            import_times.append(modules.get('main', 0))
+            loaded.update(name for name in modules if name.split('.')[0] in LAZY_MODULES)
+            
+            frame = measure_first_frame(probe_file)
+            if frame is not None:
+                frame_times.append(frame)
+    
+    return {
+        'runs': runs,
+        'import_ms': statistics.median(import_times),
+        'first_frame_ms': statistics.median(frame_times) if frame_times else None,
+        'lazy_modules_loaded': sorted({name.split('.')[0] for name in loaded}),
+    }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--database', help='database to copy for the first-frame probe')
+    arg_parser.add_argument('--runs', type=int, default=3)
+    arg_parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    args = arg_parser.parse_args(argv)
+    
+    report = run(args.database, args.runs)
+    
+    print(f"import main:       {report['import_ms']:.1f} ms (median of {report['runs']})")
+    if report['first_frame_ms'] is None:
+        print("first frame:       skipped (no display)")
+    else:
+        print(f"first frame:       {report['first_frame_ms']:.1f} ms")
+    
+    failures = []
+    if report['lazy_modules_loaded']:
+        failures.append(f"loaded at startup: {', '.join(report['lazy_modules_loaded'])}")
+    measured = report['first_frame_ms'] if report['first_frame_ms'] is not None else report['import_ms']
+    if measured > args.budget_ms:
+        failures.append(f"{measured:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+    
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
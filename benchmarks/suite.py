@@ -0,0 +1,264 @@
+"""Timings of the main code paths on synthetic data, reported as JSON.
+    
+    python -m benchmarks.suite [--accounts N] [--transactions N] [--rules N]
+        [--categories N] [--repeat N] [--seed N] [--output FILE]
+        [--compare FILE] [--threshold PERCENT] [--skip-startup]
+
+Generates a database and statements with benchmarks.synthetic and times
+each path --repeat times, every run on a fresh copy of the database:
+    
+    import_csv, import_ofx  add_bank_statement: parse, de-duplicate, apply rules
+    reimport_csv            the same statement again, every row a duplicate
+    apply_rules             auto_apply_rules after a rule has changed
+    statement_data          get_bank_statement_data for the whole account
+    statement_render        BankStatementRecon.load_data (its table's refresh)
+    calculate_totals        Accounts.calculate_totals
+    summary_render          Accounts.load_data
+    startup_import          import main (benchmarks.startup)
+    startup_first_frame     first drawn frame, when there is a display
+
+Dialogs are stubbed. Without a display the views draw into stand-in trees
+and the report says "renderer": "stub". With --compare, results more than
+--threshold percent slower than an earlier report are listed and the
+command exits non-zero."""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import database as db
+from benchmarks import headless, startup, synthetic
+
+DEFAULT_THRESHOLD = 20
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def fresh_database(data, scratch, run):
+    """Point the database module at a new copy of the generated database."""
+    database_file = os.path.join(scratch, f'run{run}.db')
+    db.close_connections()
+    shutil.copy(data['database'], database_file)
+    db.configure(database_file=database_file)
+    return database_file
+
+
+def import_statement(data, kind):
+    from bank_import import add_bank_statement
+    account_name = data['accounts'][0]
+    db.update_ofx_csv_setting(1 if kind == 'csv' else 0)
+    with headless.stub_dialogs(data['statements'][account_name][kind]):
+        add_bank_statement(None, account_name)
+
+
+def bench_import_csv(data, root):
+    return timed(lambda: import_statement(data, 'csv'))
+
+
+def bench_import_ofx(data, root):
+    return timed(lambda: import_statement(data, 'ofx'))
+
+
+def bench_reimport_csv(data, root):
+    import_statement(data, 'csv')
+    return timed(lambda: import_statement(data, 'csv'))
+
+
+def bench_apply_rules(data, root):
+    from statement_import import auto_apply_rules
+    db.add_category_rule('Benchmark', 'BENCHMARK', db.get_categories()[0], 'contains')
+    return timed(lambda: auto_apply_rules(data['accounts'][0]))
+
+
+def bench_statement_data(data, root):
+    return timed(lambda: db.get_bank_statement_data(data['accounts'][0]))
+
+
+def bench_statement_render(data, root):
+    table = headless.statement_table(data['accounts'][0], root)
+    return timed(lambda: draw(table.refresh, root))
+
+
+def bench_calculate_totals(data, root):
+    view = headless.accounts_view(root)
+    return timed(view.calculate_totals)
+
+
+def bench_summary_render(data, root):
+    view = headless.accounts_view(root)
+    return timed(lambda: draw(view.load_data, root))
+
+
+def draw(load_data, root):
+    load_data()
+    if root is not None:
+        root.update_idletasks()
+
+
+BENCHMARKS = (
+    ('import_csv', bench_import_csv),
+    ('import_ofx', bench_import_ofx),
+    ('reimport_csv', bench_reimport_csv),
+    ('apply_rules', bench_apply_rules),
+    ('statement_data', bench_statement_data),
+    ('statement_render', bench_statement_render),
+    ('calculate_totals', bench_calculate_totals),
+    ('summary_render', bench_summary_render),
+)
+
+
+def summarize(times):
+    return {
+        'median_ms': round(statistics.median(times), 3),
+        'min_ms': round(min(times), 3),
+        'max_ms': round(max(times), 3),
+        'runs_ms': [round(ms, 3) for ms in times],
+    }
+
+
+def git_version():
+    try:
+        result = subprocess.run(
+            ['git', 'describe', '--always', '--dirty'],
+            cwd=startup.ROOT, capture_output=True, text=True
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def open_root():
+    """A hidden main window styled like the app's, or None without a
+    display."""
+    if not headless.display_available():
+        return None
+    import ttkbootstrap as ttk
+    from theme import THEME_NAME, configure_treeview_style
+    root = ttk.Window(themename=THEME_NAME)
+    root.withdraw()
+    configure_treeview_style(ttk.Style())
+    return root
+
+
+def run(accounts=3, transactions=10000, rules=50, categories=20, repeat=3, seed=0, skip_startup=False, log=None):
+    """Generate the data, run every benchmark and return the report dict."""
+    log = log or (lambda message: None)
+    results = {}
+    root = open_root()
+    
+    with tempfile.TemporaryDirectory() as scratch:
+        log(f"generating {accounts} x {transactions} transactions, {rules} rules, {categories} categories")
+        data = synthetic.generate(
+            os.path.join(scratch, 'data'), accounts, transactions, rules, categories, seed=seed
+        )
+        
+        run_number = 0
+        for name, benchmark in BENCHMARKS:
+            times = []
+            for i in range(repeat):
+                run_number += 1
+                fresh_database(data, scratch, run_number)
+                times.append(benchmark(data, root))
+            results[name] = summarize(times)
+            log(f"{name:24} {results[name]['median_ms']:10.1f} ms")
+        db.close_connections()
+        
+        if not skip_startup:
+            report = startup.run(data['database'], repeat)
+            results['startup_import'] = {'median_ms': round(report['import_ms'], 3)}
+            log(f"{'startup_import':24} {report['import_ms']:10.1f} ms")
+            if report['first_frame_ms'] is not None:
+                results['startup_first_frame'] = {'median_ms': round(report['first_frame_ms'], 3)}
+                log(f"{'startup_first_frame':24} {report['first_frame_ms']:10.1f} ms")
+    
+    if root is not None:
+        root.destroy()
+    
+    return {
+        'version': git_version(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'renderer': 'tk' if root is not None else 'stub',
+        'parameters': {
+            'accounts': accounts,
+            'transactions': transactions,
+            'rules': rules,
+            'categories': categories,
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Lines describing each result against baseline, and the names of
+    those more than threshold percent slower."""
+    lines = []
+    regressions = []
+    if report['parameters'] != baseline.get('parameters'):
+        lines.append("warning: the reports were run with different parameters")
+    
+    for name, result in report['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old or not old['median_ms']:
+            continue
+        change = (result['median_ms'] - old['median_ms']) / old['median_ms'] * 100
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        lines.append(f"{name:24} {old['median_ms']:10.1f} -> {result['median_ms']:10.1f} ms ({change:+.0f}%){flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--accounts', type=int, default=3)
+    arg_parser.add_argument('--transactions', type=int, default=10000, help='stored transactions per account')
+    arg_parser.add_argument('--rules', type=int, default=50)
+    arg_parser.add_argument('--categories', type=int, default=20)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', help='write the JSON report here instead of to stdout')
+    arg_parser.add_argument('--compare', help='earlier JSON report to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='percent slower that fails --compare')
+    arg_parser.add_argument('--skip-startup', action='store_true')
+    args = arg_parser.parse_args(argv)
+    
+    report = run(
+        args.accounts, args.transactions, args.rules, args.categories, args.repeat, args.seed,
+        args.skip_startup, log=lambda message: print(message, file=sys.stderr)
+    )
+    
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    
+    if not args.compare:
+        return 0
+    
+    with open(args.compare) as handle:
+        baseline = json.load(handle)
+    lines, regressions = compare(report, baseline, args.threshold)
+    for line in lines:
+        print(line, file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
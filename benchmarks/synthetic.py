@@ -0,0 +1,183 @@
+"""Synthetic databases and bank statements for benchmarking.
+    
+    python -m benchmarks.synthetic OUTPUT_DIR [--accounts N] [--transactions N]
+        [--rules N] [--categories N] [--format csv|ofx|both] [--seed N]
+
+Writes database.db with the given number of categories, rules and
+accounts, each account holding --transactions transactions, and one
+statement per account. Every statement repeats the newest half of its
+account's stored transactions and adds as many new ones, so importing it
+exercises both inserting and de-duplication. The same seed always gives
+the same data."""
+import argparse
+import os
+import random
+import sys
+from datetime import date, timedelta
+import database as db
+
+PREFIXES = ('POS', 'EFTPOS', 'VISA', 'DD', 'TFR')
+MERCHANTS = (
+    'WOOLWORTHS', 'COLES', 'ALDI', 'BP', 'SHELL', 'AMPOL', 'KMART', 'BUNNINGS',
+    'TELSTRA', 'OPTUS', 'NETFLIX', 'SPOTIFY', 'UBER', 'MCDONALDS', 'KFC',
+    'CHEMIST WHS', 'OFFICEWORKS', 'JB HIFI', 'MYER', 'DAVID JONES', 'IKEA',
+    'AGL', 'ORIGIN', 'COUNCIL', 'ATO', 'SALARY', 'INTEREST', 'RENT', 'GYM',
+    'CAFE',
+)
+PLACES = ('SYDNEY', 'MELBOURNE', 'BRISBANE', 'PERTH', 'ADELAIDE', 'HOBART')
+MATCH_TYPES = ('exact', 'prefix', 'contains', 'regex')
+
+START_DATE = date(2020, 1, 1)
+
+CSV_COLUMNS = (0, 1, 2)
+
+OFX_HEADER = (
+    "OFXHEADER:100\r\nDATA:OFXSGML\r\nVERSION:102\r\nSECURITY:NONE\r\n"
+    "ENCODING:USASCII\r\nCHARSET:1252\r\nCOMPRESSION:NONE\r\n"
+    "OLDFILEUID:NONE\r\nNEWFILEUID:NONE\r\n\r\n"
+)
+
+
+def statement_rows(count, seed=0):
+    """count rows of (YYYY-MM-DD, description, amount), a few per day from
+    START_DATE. Descriptions fit the 30 characters kept from OFX memos, so
+    the CSV and OFX statements import the same rows."""
+    rng = random.Random(seed)
+    day = START_DATE
+    rows = []
+    for i in range(count):
+        if rng.random() < 0.3:
+            day += timedelta(days=1)
+        description = f"{rng.choice(PREFIXES)} {rng.choice(MERCHANTS)} {rng.choice(PLACES)}"
+        amount = rng.randint(-50000, 20000) / 100
+        rows.append((day.isoformat(), description, f"{amount:.2f}"))
+    return rows
+
+
+def category_names(count):
+    return [f"Category {i + 1}" for i in range(count)]
+
+
+def rule_specs(count, categories, seed=0):
+    """count rules as (name, pattern, category, match type, priority),
+    spread over the match types and aimed at the generated merchants."""
+    rng = random.Random(seed)
+    rules = []
+    for i in range(count):
+        merchant = MERCHANTS[i % len(MERCHANTS)]
+        match_type = MATCH_TYPES[i % len(MATCH_TYPES)]
+        if match_type == 'exact':
+            pattern = f"{rng.choice(PREFIXES)} {merchant} {rng.choice(PLACES)}"
+        elif match_type == 'prefix':
+            pattern = f"{rng.choice(PREFIXES)} {merchant}"
+        elif match_type == 'contains':
+            pattern = merchant
+        else:
+            pattern = rf"^{rng.choice(PREFIXES)} {merchant} (SYDNEY|PERTH)$"
+        rules.append((f"Rule {i + 1}", pattern, rng.choice(categories), match_type, rng.randint(0, 3)))
+    return rules
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as handle:
+        handle.write("Date,Description,Amount\n")
+        for row_date, description, amount in rows:
+            handle.write(f"{row_date},{description},{amount}\n")
+
+
+def write_ofx(path, rows, account_id='000000'):
+    dates = [row_date.replace('-', '') for row_date, description, amount in rows] or ['20200101']
+    with open(path, 'w', encoding='cp1252', newline='') as handle:
+        handle.write(OFX_HEADER)
+        handle.write(
+            "<OFX><SIGNONMSGSRSV1><SONRS><STATUS><CODE>0<SEVERITY>INFO</STATUS>"
+            f"<DTSERVER>{dates[-1]}<LANGUAGE>ENG</SONRS></SIGNONMSGSRSV1>"
+            "<BANKMSGSRSV1><STMTTRNRS><TRNUID>1<STATUS><CODE>0<SEVERITY>INFO</STATUS>"
+            f"<STMTRS><CURDEF>AUD<BANKACCTFROM><BANKID>000000<ACCTID>{account_id}"
+            f"<ACCTTYPE>CHECKING</BANKACCTFROM><BANKTRANLIST><DTSTART>{dates[0]}<DTEND>{dates[-1]}\r\n"
+        )
+        for i, ((row_date, description, amount), posted) in enumerate(zip(rows, dates)):
+            kind = 'DEBIT' if amount.startswith('-') else 'CREDIT'
+            handle.write(
+                f"<STMTTRN><TRNTYPE>{kind}<DTPOSTED>{posted}"
+                f"<TRNAMT>{amount}<FITID>{i}<NAME>{description}<MEMO>{description}</STMTTRN>\r\n"
+            )
+        handle.write(
+            f"</BANKTRANLIST><LEDGERBAL><BALAMT>0.00<DTASOF>{dates[-1]}</LEDGERBAL>"
+            "</STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\r\n"
+        )
+
+
+def generate(output_dir, accounts=3, transactions=10000, rules=50, categories=20, formats=('csv', 'ofx'), seed=0):
+    """Write the database and statements into output_dir. Returns
+    {'database': path, 'accounts': [name, ...], 'statements': {name:
+    {format: path}}}. Leaves the database module configured for it."""
+    from statement_import import auto_apply_rules
+    
+    os.makedirs(output_dir, exist_ok=True)
+    database_file = os.path.join(output_dir, 'database.db')
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(database_file + suffix):
+            os.remove(database_file + suffix)
+    
+    db.configure(database_file=database_file)
+    db.init_database()
+    db.update_options(CSV_COLUMNS[0], CSV_COLUMNS[2], CSV_COLUMNS[1])
+    
+    names = category_names(categories)
+    for name in names:
+        db.add_category(name)
+    # Rows put in 'Delete' are removed, which would change the row counts.
+    names = [name for name in db.get_categories() if name != 'Delete']
+    for rule in rule_specs(rules, names, seed):
+        db.add_category_rule(*rule)
+    
+    result = {'database': database_file, 'accounts': [], 'statements': {}}
+    for i in range(accounts):
+        account_name = f"Account{i + 1}"
+        db.add_bank_account(account_name)
+        
+        rows = statement_rows(transactions + transactions // 2, seed + i)
+        db.add_transactions(account_name, rows[:transactions])
+        auto_apply_rules(account_name)
+        
+        statement = rows[transactions // 2:]
+        files = {}
+        if 'csv' in formats:
+            files['csv'] = os.path.join(output_dir, f"{account_name}.csv")
+            write_csv(files['csv'], statement)
+        if 'ofx' in formats:
+            files['ofx'] = os.path.join(output_dir, f"{account_name}.ofx")
+            write_ofx(files['ofx'], statement, account_id=f"{i + 1:06d}")
+        
+        result['accounts'].append(account_name)
+        result['statements'][account_name] = files
+    
+    db.close_connections()
+    return result
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('output_dir')
+    arg_parser.add_argument('--accounts', type=int, default=3)
+    arg_parser.add_argument('--transactions', type=int, default=10000, help='stored transactions per account')
+    arg_parser.add_argument('--rules', type=int, default=50)
+    arg_parser.add_argument('--categories', type=int, default=20)
+    arg_parser.add_argument('--format', choices=('csv', 'ofx', 'both'), default='both')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args(argv)
+    
+    formats = ('csv', 'ofx') if args.format == 'both' else (args.format,)
+    result = generate(
+        args.output_dir, args.accounts, args.transactions, args.rules, args.categories, formats, args.seed
+    )
+    print(f"database:   {result['database']}")
+    for account_name, files in result['statements'].items():
+        for kind, path in files.items():
+            print(f"{kind + ':':11} {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
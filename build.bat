@@ -16,7 +16,7 @@ if errorlevel 1 (
 echo.
 echo Installing required packages...
 echo ------------------------------------------------
-pip install ttkbootstrap python-dateutil pandas ofxtools pillow pyinstaller
+pip install ttkbootstrap python-dateutil ofxtools pillow pyinstaller
 
 if errorlevel 1 (
     echo [ERROR] Failed to install packages.
@@ -2,7 +2,7 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox
 import database as db
-from theme import create_styled_treeview, create_button, create_entry, create_label, create_labelframe
+from theme import TableBinding, create_styled_treeview, create_button, create_entry, create_label, create_labelframe
 
 
 class Categories(ttk.Frame):
@@ -16,6 +16,7 @@ class Categories(ttk.Frame):
         widths = (60, 200, 120)
         tree_frame, self.tree = create_styled_treeview(main_container, columns, widths)
         tree_frame.pack(fill=BOTH, expand=True, pady=(0, 20))
+        self.binding = TableBinding(self.tree)
         
         data_frame = create_labelframe(main_container, text="Category Details")
         data_frame.pack(fill=X, pady=(0, 15))
@@ -48,15 +49,12 @@ class Categories(ttk.Frame):
         self.load_data()
     
     def load_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         records = db.execute_query("SELECT rowid, * FROM category", fetch=True) or []
         
-        for i, record in enumerate(records):
-            budget = record[2] if record[2] != 'None' else '-'
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert('', 'end', values=(record[0], record[1], budget), tags=(tag,))
+        self.binding.render(
+            (record[0], record[1], record[2] if record[2] != 'None' else '-')
+            for record in records
+        )
     
     def add_record(self):
         try:
@@ -2,29 +2,8 @@ import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox
 import database as db
-from theme import create_styled_treeview, create_button, create_entry, create_label, create_labelframe, create_combobox
-
-
-def auto_apply_rules(account_name):
-    safe_name = db.sanitize_table_name(account_name)
-    rules = db.get_category_rules()
-    transactions = db.execute_query(f"SELECT description, category FROM {safe_name}", fetch=True) or []
-    
-    for trans_desc, trans_cat in transactions:
-        for rule in rules:
-            rule_applied_to = rule[2]
-            rule_category = rule[3]
-            
-            if trans_cat == 'Delete':
-                db.execute_query(
-                    f"DELETE FROM {safe_name} WHERE description = ?",
-                    (trans_desc,)
-                )
-            elif rule_applied_to == trans_desc and trans_cat == 'Please Select':
-                db.execute_query(
-                    f"UPDATE {safe_name} SET category = ? WHERE description = ?",
-                    (rule_category, trans_desc)
-                )
+from rule_matcher import MATCH_TYPES, validate_pattern
+from theme import TableBinding, create_styled_treeview, create_button, create_entry, create_label, create_labelframe, create_combobox
 
 
 def auto_add_rule(rule_name, applied_to, category):
@@ -41,10 +20,11 @@ class CategoryRules(ttk.Frame):
         main_container = ttk.Frame(self, padding=20)
         main_container.pack(fill=BOTH, expand=True)
         
-        columns = ("ID", "Rule Name", "Matches Description", "Assigns Category")
-        widths = (60, 150, 200, 150)
+        columns = ("ID", "Rule Name", "Match Type", "Matches Description", "Assigns Category", "Priority")
+        widths = (60, 150, 100, 200, 150, 70)
         tree_frame, self.tree = create_styled_treeview(main_container, columns, widths)
         tree_frame.pack(fill=BOTH, expand=True, pady=(0, 20))
+        self.binding = TableBinding(self.tree)
         
         data_frame = create_labelframe(main_container, text="Rule Details")
         data_frame.pack(fill=X, pady=(0, 15))
@@ -69,9 +49,19 @@ class CategoryRules(ttk.Frame):
         self.category_combo.grid(row=0, column=7, padx=10, pady=8, sticky=W)
         self.category_combo.bind('<Button-1>', lambda e: self.update_category_options())
         
+        create_label(fields_container, text="Match Type:").grid(row=1, column=4, padx=10, pady=8, sticky=E)
+        self.match_type_combo = create_combobox(fields_container, values=tuple(MATCH_TYPES.values()), width=23, state='readonly')
+        self.match_type_combo.grid(row=1, column=5, padx=10, pady=8, sticky=W)
+        self.match_type_combo.set(MATCH_TYPES['exact'])
+        
+        create_label(fields_container, text="Priority:").grid(row=1, column=6, padx=10, pady=8, sticky=E)
+        self.priority_entry = create_entry(fields_container, width=10)
+        self.priority_entry.grid(row=1, column=7, padx=10, pady=8, sticky=W)
+        
         button_frame = ttk.Frame(main_container)
         button_frame.pack(fill=X)
         
+        create_button(button_frame, text="Add Rule", command=self.add_record, bootstyle="success").pack(side=LEFT, padx=5)
         create_button(button_frame, text="Update Rule", command=self.update_record, bootstyle="info").pack(side=LEFT, padx=5)
         create_button(button_frame, text="Delete Rule", command=self.remove_record, bootstyle="danger").pack(side=LEFT, padx=5)
         create_button(button_frame, text="Clear Fields", command=self.clear_entries, bootstyle="secondary").pack(side=LEFT, padx=5)
@@ -83,26 +73,65 @@ class CategoryRules(ttk.Frame):
     def update_category_options(self):
         self.category_combo['values'] = db.get_categories()
     
+    def get_match_type(self):
+        label = self.match_type_combo.get()
+        for match_type, match_label in MATCH_TYPES.items():
+            if match_label == label:
+                return match_type
+        return 'exact'
+    
     def load_data(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
         records = db.get_category_rules()
         
-        for i, record in enumerate(records):
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.tree.insert('', 'end', values=(record[0], record[1], record[2], record[3]), tags=(tag,))
+        self.binding.render(
+            (record[0], record[1], MATCH_TYPES.get(record[4], record[4]), record[2], record[3], record[5])
+            for record in records
+        )
+    
+    def get_rule(self):
+        """Match type and priority from the fields, checked."""
+        match_type = self.get_match_type()
+        validate_pattern(match_type, self.match_entry.get())
+        
+        priority = self.priority_entry.get().strip() or '0'
+        if not priority.lstrip('-').isdigit():
+            raise Exception("Priority must be a whole number")
+        return match_type, int(priority)
+    
+    def add_record(self):
+        try:
+            category = self.category_combo.get()
+            if not category or category == 'Please Select':
+                raise Exception("Please select a category for the rule")
+            
+            match_type, priority = self.get_rule()
+            db.add_category_rule(
+                self.name_entry.get(),
+                self.match_entry.get(),
+                category,
+                match_type,
+                priority
+            )
+            
+            self.clear_entries()
+            self.load_data()
+            
+        except Exception as error:
+            messagebox.showerror('Error', str(error))
     
     def update_record(self):
         try:
             if not self.id_entry.get():
                 raise Exception("Please select a rule to update")
             
+            match_type, priority = self.get_rule()
             db.update_category_rule(
                 self.name_entry.get(),
                 self.match_entry.get(),
                 self.category_combo.get(),
-                self.id_entry.get()
+                self.id_entry.get(),
+                match_type,
+                priority
             )
             
             self.clear_entries()
@@ -140,8 +169,10 @@ class CategoryRules(ttk.Frame):
         self.id_entry.insert(0, values[0])
         self.id_entry.configure(state='readonly')
         self.name_entry.insert(0, values[1])
-        self.match_entry.insert(0, values[2])
-        self.category_combo.set(values[3])
+        self.match_type_combo.set(values[2])
+        self.match_entry.insert(0, values[3])
+        self.category_combo.set(values[4])
+        self.priority_entry.insert(0, values[5])
     
     def clear_entries(self):
         self.id_entry.configure(state='normal')
@@ -150,6 +181,8 @@ class CategoryRules(ttk.Frame):
         self.name_entry.delete(0, END)
         self.match_entry.delete(0, END)
         self.category_combo.set('')
+        self.match_type_combo.set(MATCH_TYPES['exact'])
+        self.priority_entry.delete(0, END)
     
     def refresh(self):
         self.load_data()
@@ -0,0 +1,190 @@
+"""Import statements, apply the category rules and report statistics without
+the GUI, e.g. from cron. Results are printed as JSON.
+    
+    python cli.py [--database FILE] import PATH... [--account NAME]
+        [--format auto|csv|ofx] [--date-column A] [--description-column B]
+        [--amount-column C]
+    python cli.py [--database FILE] apply-rules [--account NAME]...
+    python cli.py [--database FILE] stats [--account NAME]...
+
+A PATH can be a statement file or a folder, which is searched for CSV, OFX
+and QFX files. Without --account each file goes to the account named in its
+file or folder name, as in Batch Import. CSV columns are letters, as in
+Settings, and default to the saved ones. Exits 1 when a file could not be
+imported and 2 on bad arguments. Tk and ttkbootstrap are never imported."""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import database as db
+from statement_import import auto_apply_rules, get_csv_columns, guess_account, import_statement_files
+from statement_parsers import find_statements, statement_type
+
+
+def column_letter(value):
+    letter = value.strip().upper()
+    if len(letter) != 1 or not 'A' <= letter <= 'Z':
+        raise argparse.ArgumentTypeError(f"invalid column letter: {value!r} (use A-Z)")
+    return ord(letter) - ord('A')
+
+
+def account_names(arg_parser, requested):
+    """The requested accounts, or every account when none were given."""
+    accounts = [acc[0] for acc in db.get_bank_accounts()]
+    unknown = [name for name in requested or () if name not in accounts]
+    if unknown:
+        arg_parser.error(f"unknown account: {', '.join(unknown)}")
+    return requested or accounts
+
+
+def statement_files(arg_parser, paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += find_statements(path)
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            arg_parser.error(f"no such file or folder: {path}")
+    if not files:
+        arg_parser.error("no statements found")
+    return files
+
+
+def account_stats(accounts=None):
+    return [
+        {
+            'account': account,
+            'transactions': count,
+            'uncategorized': uncategorized,
+            'first_date': first,
+            'last_date': last,
+        }
+        for account, count, uncategorized, first, last in db.get_account_stats()
+        if accounts is None or account in accounts
+    ]
+
+
+def import_command(args, arg_parser):
+    files = statement_files(arg_parser, args.paths)
+    kind = None if args.format == 'auto' else args.format
+    
+    if args.account:
+        account_names(arg_parser, [args.account])
+        statements = [(file, args.account) for file in files]
+    else:
+        accounts = account_names(arg_parser, None)
+        statements = [(file, guess_account(file, accounts)) for file in files]
+        unmatched = [file for file, account in statements if not account]
+        if unmatched:
+            arg_parser.error(f"no account matches {', '.join(unmatched)}; use --account")
+    
+    csv_columns = None
+    if any((kind or statement_type(file)) == 'csv' for file in files):
+        overrides = (args.date_column, args.description_column, args.amount_column)
+        csv_columns = tuple(
+            saved if override is None else override
+            for saved, override in zip(get_csv_columns(), overrides)
+        )
+    
+    summary = import_statement_files(statements, csv_columns, kind=kind)
+    failed = sum(1 for row in summary if row[4])
+    report = {
+        'added': sum(row[2] for row in summary),
+        'skipped': sum(row[3] for row in summary),
+        'failed': failed,
+        'files': [
+            {'file': file, 'account': account, 'added': added, 'skipped': skipped, 'error': error}
+            for file, account, added, skipped, error in summary
+        ],
+    }
+    return report, 1 if failed else 0
+
+
+def apply_rules_command(args, arg_parser):
+    accounts = account_names(arg_parser, args.account)
+    before = {row['account']: row for row in account_stats(accounts)}
+    
+    applied = []
+    for account_name in accounts:
+        if db.account_needs_rules(account_name):
+            auto_apply_rules(account_name)
+            applied.append(account_name)
+    
+    report = {'accounts': []}
+    for row in account_stats(accounts):
+        old = before[row['account']]
+        report['accounts'].append({
+            'account': row['account'],
+            'applied': row['account'] in applied,
+            'transactions_before': old['transactions'],
+            'transactions': row['transactions'],
+            'uncategorized_before': old['uncategorized'],
+            'uncategorized': row['uncategorized'],
+        })
+    return report, 0
+
+
+def budget_value(budget):
+    try:
+        return float(budget)
+    except (TypeError, ValueError):
+        return None
+
+
+def stats_command(args, arg_parser):
+    accounts = account_names(arg_parser, args.account)
+    report = {
+        'database': os.path.abspath(db.DATABASE_FILE),
+        'accounts': account_stats(accounts),
+        'categories': [
+            {'category': category, 'total': total, 'budget': budget_value(budget)}
+            for category, total, budget in db.get_category_summary()
+        ],
+    }
+    return report, 0
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--database', default=db.DATABASE_FILE, help='database file (default: %(default)s)')
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    
+    import_parser = commands.add_parser('import', help='import statement files and apply the rules')
+    import_parser.add_argument('paths', nargs='+', metavar='PATH', help='statement file or folder')
+    import_parser.add_argument('--account', help='import every file into this account')
+    import_parser.add_argument('--format', choices=('auto', 'csv', 'ofx'), default='auto', help='default: from the file extension')
+    import_parser.add_argument('--date-column', type=column_letter, metavar='LETTER')
+    import_parser.add_argument('--description-column', type=column_letter, metavar='LETTER')
+    import_parser.add_argument('--amount-column', type=column_letter, metavar='LETTER')
+    import_parser.set_defaults(run=import_command)
+    
+    rules_parser = commands.add_parser('apply-rules', help='apply the category rules')
+    rules_parser.add_argument('--account', action='append', help='only this account (repeatable)')
+    rules_parser.set_defaults(run=apply_rules_command)
+    
+    stats_parser = commands.add_parser('stats', help='transaction counts and category totals')
+    stats_parser.add_argument('--account', action='append', help='only this account (repeatable)')
+    stats_parser.set_defaults(run=stats_command)
+    
+    args = arg_parser.parse_args(argv)
+    
+    if not os.path.exists(args.database):
+        arg_parser.error(f"database not found: {args.database}")
+    db.configure(database_file=args.database)
+    db.enable_query_stats_from_environment()
+    db.init_database()
+    
+    try:
+        report, status = args.run(args, arg_parser)
+    finally:
+        db.close_connections()
+    
+    print(json.dumps(report, indent=2))
+    return status
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,10 +1,35 @@
 import sqlite3
 import os
+import hashlib
+import itertools
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 import re
+import atexit
+import threading
+import functools
+import types
 from contextlib import contextmanager
+import query_stats
+from dates import DateParser, format_date, to_date_int
 
 DATABASE_FILE = 'database.db'
 
+# Tuning applied to every connection the manager opens. Use configure() to
+# change these at runtime; open connections are closed and reopened.
+PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 268435456,
+}
+CACHED_STATEMENTS = 256
+
+IMPORT_CHUNK_SIZE = 5000
+
+# Most rows a transaction search returns.
+SEARCH_LIMIT = 1000
+
+READ_KEYWORDS = ('SELECT', 'WITH', 'EXPLAIN')
+
 def sanitize_table_name(name):
     """Validate and sanitize table names to prevent SQL injection.
     Only allows alphanumeric characters and underscores."""
@@ -18,21 +43,314 @@ def sanitize_table_name(name):
         raise ValueError(f"Reserved word cannot be used as table name: {name}")
     return name
 
-@contextmanager
-def get_connection():
-    conn = sqlite3.connect(DATABASE_FILE)
+class ConnectionManager:
+    """Long-lived connections to one database file: a single writer shared by
+    all threads (serialized by a lock) and one read-only connection per thread.
+    All connections run in WAL mode so readers never block the writer."""
+    
+    def __init__(self, database_file, pragmas, cached_statements):
+        self.database_file = database_file
+        self.pragmas = dict(pragmas)
+        self.cached_statements = cached_statements
+        self._lock = threading.RLock()
+        self._writer = None
+        self._owner = None
+        self._depth = 0
+        self._local = threading.local()
+        self._readers = []
+        self._after = []
+    
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(
+            self.database_file,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=query_stats.connection_factory()
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        for name, value in self.pragmas.items():
+            if not re.match(r'^-?[A-Za-z0-9_]+$', str(value)):
+                raise ValueError(f"Invalid value for PRAGMA {name}: {value}")
+            conn.execute(f"PRAGMA {name} = {value}")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+    
+    def writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            return self._writer
+    
+    def reader(self):
+        # Inside a write transaction on this thread, reads must see the
+        # uncommitted rows, so they go through the writer.
+        if self.in_transaction():
+            return self._writer
+        
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            self.writer()
+            conn = self._connect(read_only=True)
+            self._local.conn = conn
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+    
+    def in_transaction(self):
+        """Whether this thread is inside a write transaction."""
+        return bool(self._depth) and self._owner == threading.get_ident()
+    
+    def after_transaction(self, callback):
+        """Call callback() once the current outermost transaction has been
+        committed or rolled back."""
+        self._after.append(callback)
+    
+    @contextmanager
+    def transaction(self):
+        """Run a block inside one write transaction. Nested blocks become
+        savepoints, so an inner failure only undoes the inner work."""
+        with self._lock:
+            conn = self.writer()
+            
+            if self._depth:
+                savepoint = f"sp{self._depth}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+                self._depth += 1
+                try:
+                    yield conn
+                except BaseException:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                    raise
+                else:
+                    conn.execute(f"RELEASE {savepoint}")
+                finally:
+                    self._depth -= 1
+                return
+            
+            conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            self._owner = threading.get_ident()
+            _active.manager = self
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._depth = 0
+                self._owner = None
+                _active.manager = None
+                callbacks, self._after = self._after, []
+                for callback in callbacks:
+                    callback()
+    
+    def close(self):
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._local = threading.local()
+            
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+_manager = None
+_manager_lock = threading.Lock()
+
+# The manager whose transaction this thread is in. A transaction keeps using
+# it even after configure() or close_connections() has replaced it; closing
+# the old manager waits for the transaction to end.
+_active = threading.local()
+
+def get_manager():
+    global _manager
+    manager = getattr(_active, 'manager', None)
+    if manager is not None:
+        return manager
+    
+    old = None
+    with _manager_lock:
+        if _manager is None or _manager.database_file != DATABASE_FILE:
+            old = _manager
+            _manager = ConnectionManager(DATABASE_FILE, PRAGMAS, CACHED_STATEMENTS)
+        manager = _manager
+    # Closed outside _manager_lock: close() waits for any transaction,
+    # which may itself need get_manager().
+    if old is not None:
+        old.close()
+    return manager
+
+def configure(database_file=None, cached_statements=None, **pragmas):
+    """Change the database file, statement cache size or PRAGMA tuning
+    (e.g. synchronous='FULL', cache_size=-64000, mmap_size=0)."""
+    global DATABASE_FILE, CACHED_STATEMENTS
+    
+    if database_file is not None:
+        DATABASE_FILE = database_file
+    if cached_statements is not None:
+        CACHED_STATEMENTS = cached_statements
+    PRAGMAS.update(pragmas)
+    
+    close_connections()
+    read_cache.clear()
+
+def close_connections():
+    global _manager
+    with _manager_lock:
+        old, _manager = _manager, None
+    if old is not None:
+        old.close()
+
+atexit.register(close_connections)
+
+def enable_query_stats(slow_ms=None, dump_file=None):
+    """Record the time and rows of every statement in query_stats.stats,
+    logging those slower than slow_ms with the calling stack. With
+    dump_file the report is written there at exit. Open connections are
+    closed so they reopen instrumented; call it outside transactions."""
+    query_stats.stats.enable(slow_ms)
+    if dump_file:
+        atexit.register(dump_query_stats, dump_file)
+    close_connections()
+
+def disable_query_stats():
+    query_stats.stats.disable()
+    close_connections()
+
+def enable_query_stats_from_environment():
+    """enable_query_stats() as set by EXPENSE_TRACKER_QUERY_STATS (a file
+    to write the report to at exit, or 1) and EXPENSE_TRACKER_SLOW_MS."""
+    value = os.environ.get(query_stats.STATS_VARIABLE, '').strip()
+    if not value or value == '0':
+        return False
+    slow_ms = os.environ.get(query_stats.SLOW_MS_VARIABLE)
+    enable_query_stats(
+        slow_ms=float(slow_ms) if slow_ms else None,
+        dump_file=None if value == '1' else value
+    )
+    return True
+
+def explain_query_plan(sql, params=()):
+    """EXPLAIN QUERY PLAN for sql as indented lines. Runs on its own
+    read-only connection, so it is not recorded itself."""
+    from urllib.request import pathname2url
+    
+    uri = f"file:{pathname2url(os.path.abspath(DATABASE_FILE))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True)
     try:
-        yield conn
+        depths = {0: -1}
+        lines = []
+        for node, parent, unused, detail in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()):
+            depths[node] = depths.get(parent, -1) + 1
+            lines.append("  " * depths[node] + detail)
+        return lines
     finally:
         conn.close()
 
+def query_stats_report():
+    return query_stats.format_report(explain=explain_query_plan)
+
+def dump_query_stats(file):
+    with open(file, 'w', encoding='utf-8') as handle:
+        handle.write(query_stats_report())
+
+def transaction():
+    return get_manager().transaction()
+
+class ReadCache:
+    """In-process copies of small tables that are read far more often than
+    they are written, such as categories and rules. Entries are grouped by
+    table, and the functions that write a table drop its entries.
+    
+    Inside a write transaction that changed a table, reads of it go to the
+    database, which has the uncommitted rows. The table is dropped again
+    when the transaction ends, since other threads may have stored its old
+    rows meanwhile; a generation count stops a read that overlapped a write
+    from storing what it read."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._dirty = set()
+        self._generation = 0
+    
+    def get(self, table, name, load):
+        uncommitted = table in self._dirty and get_manager().in_transaction()
+        if uncommitted:
+            return load()
+        
+        with self._lock:
+            entries = self._tables.get(table, {})
+            if name in entries:
+                return entries[name]
+            generation = self._generation
+        
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._tables.setdefault(table, {})[name] = value
+        return value
+    
+    def invalidate(self, *tables):
+        manager = get_manager()
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                self._tables.pop(table, None)
+            
+            if manager.in_transaction():
+                if not self._dirty:
+                    manager.after_transaction(self._transaction_finished)
+                self._dirty.update(tables)
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._tables.clear()
+            self._dirty.clear()
+    
+    def _transaction_finished(self):
+        with self._lock:
+            self._generation += 1
+            for table in self._dirty:
+                self._tables.pop(table, None)
+            self._dirty.clear()
+
+read_cache = ReadCache()
+
+def cached(table):
+    """Serve a function's result from read_cache until table is written.
+    Cached results are shared, so the function should return tuples."""
+    def decorate(load):
+        @functools.wraps(load)
+        def wrapper():
+            return read_cache.get(table, load.__name__, load)
+        return wrapper
+    return decorate
+
+@contextmanager
+def get_connection():
+    with transaction() as conn:
+        yield conn
+
+def is_read_query(query):
+    words = query.lstrip().split(None, 1)
+    return bool(words) and words[0].upper() in READ_KEYWORDS
+
 def execute_query(query, params=None, fetch=False, fetchone=False):
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+    if (fetch or fetchone) and is_read_query(query):
+        cursor = get_manager().reader().execute(query, params or ())
+        return cursor.fetchall() if fetch else cursor.fetchone()
+    
+    with transaction() as conn:
+        cursor = conn.execute(query, params or ())
         
         if fetch:
             result = cursor.fetchall()
@@ -41,20 +359,17 @@ def execute_query(query, params=None, fetch=False, fetchone=False):
         else:
             result = None
         
-        conn.commit()
         return result
 
 def execute_many(query, params_list):
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.executemany(query, params_list)
-        conn.commit()
+    with transaction() as conn:
+        return conn.executemany(query, params_list).rowcount
 
 def init_database(reinit=None):
     file = DATABASE_FILE
     
     if not os.path.exists(file) or reinit == 'reinit':
-        with get_connection() as conn:
+        with transaction() as conn:
             c = conn.cursor()
             
             c.execute('''CREATE TABLE IF NOT EXISTS bankStatement (
@@ -102,117 +417,808 @@ def init_database(reinit=None):
                 c.execute("INSERT INTO ofxCsv VALUES (?, ?)", (0, 0))
             
             c.execute("CREATE TABLE IF NOT EXISTS bankAccountNames (account TEXT)")
+    
+    migrate()
+    read_cache.clear()
+
+def table_columns(conn, table):
+    return [col[1] for col in conn.execute(f"PRAGMA table_info({table})")]
+
+def account_tables(conn):
+    """The per-account tables used before migration 3, each once. The same
+    account could be added twice, and SQLite table names ignore case, so
+    several bankAccountNames rows can share one table."""
+    tables = {}
+    for (account_name,) in conn.execute("SELECT DISTINCT account FROM bankAccountNames"):
+        safe_name = sanitize_table_name(account_name)
+        if safe_name.lower() not in tables and table_columns(conn, safe_name):
+            tables[safe_name.lower()] = safe_name
+    return list(tables.values())
+
+def get_schema_version(conn):
+    conn.execute("CREATE TABLE IF NOT EXISTS schemaVersion (version INTEGER)")
+    result = conn.execute("SELECT version FROM schemaVersion").fetchone()
+    if result is None:
+        conn.execute("INSERT INTO schemaVersion VALUES (?)", (0,))
+        return 0
+    return result[0]
+
+def migrate():
+    """Apply every migration newer than the database's schemaVersion, in
+    order and in one transaction, so an upgrade either completes or leaves
+    the file as it was."""
+    with transaction() as conn:
+        version = get_schema_version(conn)
+        
+        for target, migration in MIGRATIONS:
+            if target > version:
+                migration(conn)
+                conn.execute("UPDATE schemaVersion SET version = ?", (target,))
+                version = target
+
+def migration_1_upgrade_tables(conn):
+    # Tables from before versioned migrations: transaction fingerprints,
+    # incremental categorization state and rule match types. Each step
+    # checks for itself because earlier releases applied some of them.
+    conn.execute("CREATE TABLE IF NOT EXISTS rulesVersion (id INTEGER, version INTEGER)")
+    if conn.execute("SELECT COUNT(*) FROM rulesVersion").fetchone()[0] == 0:
+        conn.execute("INSERT INTO rulesVersion VALUES (?, ?)", (0, 0))
+    
+    if 'rulesVersion' not in table_columns(conn, 'bankAccountNames'):
+        conn.execute("ALTER TABLE bankAccountNames ADD COLUMN rulesVersion INTEGER")
+    
+    rule_columns = table_columns(conn, 'categoryRules')
+    if 'matchType' not in rule_columns:
+        conn.execute("ALTER TABLE categoryRules ADD COLUMN matchType TEXT NOT NULL DEFAULT 'exact'")
+    if 'priority' not in rule_columns:
+        conn.execute("ALTER TABLE categoryRules ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    
+    for safe_name in account_tables(conn):
+        columns = table_columns(conn, safe_name)
+        
+        if 'fingerprint' not in columns:
+            conn.execute(f"ALTER TABLE {safe_name} ADD COLUMN fingerprint TEXT")
+            records = conn.execute(f"SELECT rowid, date, description, amount FROM {safe_name} ORDER BY rowid").fetchall()
+            
+            occurrences = {}
+            updates = []
+            for oid, date, description, amount in records:
+                key = fingerprint_key(to_date_int(date), description, to_cents(amount))
+                occurrences[key] = occurrences.get(key, 0) + 1
+                updates.append((f"{key}:{occurrences[key]}", oid))
             
-            conn.commit()
+            conn.executemany(f"UPDATE {safe_name} SET fingerprint = ? WHERE rowid = ?", updates)
+        
+        if 'needsRules' not in columns:
+            conn.execute(f"ALTER TABLE {safe_name} ADD COLUMN needsRules INTEGER NOT NULL DEFAULT 1")
+        
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {safe_name}_fingerprint ON {safe_name} (fingerprint)")
+
+def migration_2_typed_columns(conn):
+    # Store amounts as INTEGER cents and dates as INTEGER YYYYMMDD. SQLite
+    # cannot change a column's type in place, so each account table is
+    # copied into a new one with the same rowids. Values that do not parse
+    # are kept as they were.
+    for safe_name in account_tables(conn):
+        column_types = {col[1]: col[2].upper() for col in conn.execute(f"PRAGMA table_info({safe_name})")}
+        if column_types.get('amount') == 'INTEGER':
+            continue
+        new_name = f"{safe_name}_typed"
+        
+        conn.execute(f"DROP TABLE IF EXISTS {new_name}")
+        conn.execute(f'''CREATE TABLE {new_name} (
+            date INTEGER,
+            description TEXT,
+            amount INTEGER,
+            category TEXT,
+            fingerprint TEXT,
+            needsRules INTEGER NOT NULL DEFAULT 1
+        )''')
+        
+        records = conn.execute(
+            f"SELECT rowid, date, description, amount, category, needsRules FROM {safe_name} ORDER BY rowid"
+        ).fetchall()
+        
+        occurrences = {}
+        rows = []
+        for oid, date, description, amount, category, needs_rules in records:
+            date, amount = to_date_int(date), to_cents(amount)
+            key = fingerprint_key(date, description, amount)
+            occurrences[key] = occurrences.get(key, 0) + 1
+            rows.append((oid, date, description, amount, category, f"{key}:{occurrences[key]}", needs_rules))
+        
+        conn.executemany(
+            f"INSERT INTO {new_name} (rowid, date, description, amount, category, fingerprint, needsRules) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.execute(f"DROP TABLE {safe_name}")
+        conn.execute(f"ALTER TABLE {new_name} RENAME TO {safe_name}")
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {safe_name}_fingerprint ON {safe_name} (fingerprint)")
 
+def migration_3_transactions_table(conn):
+    # Move every per-account table into one transactions table keyed by
+    # accountId. bankAccountNames is rebuilt first so it has an explicit
+    # id for the foreign key to reference; existing rowids become ids.
+    conn.execute('''CREATE TABLE accounts_new (
+        id INTEGER PRIMARY KEY,
+        account TEXT NOT NULL UNIQUE,
+        rulesVersion INTEGER
+    )''')
+    conn.execute(
+        """INSERT OR IGNORE INTO accounts_new (id, account, rulesVersion)
+        SELECT rowid, account, rulesVersion FROM bankAccountNames ORDER BY rowid"""
+    )
+    conn.execute("DROP TABLE bankAccountNames")
+    conn.execute("ALTER TABLE accounts_new RENAME TO bankAccountNames")
+    
+    conn.execute('''CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY,
+        accountId INTEGER NOT NULL REFERENCES bankAccountNames (id) ON DELETE CASCADE,
+        date INTEGER,
+        description TEXT,
+        amount INTEGER,
+        category TEXT,
+        fingerprint TEXT,
+        needsRules INTEGER NOT NULL DEFAULT 1
+    )''')
+    
+    for account_id, account_name in conn.execute("SELECT id, account FROM bankAccountNames").fetchall():
+        safe_name = sanitize_table_name(account_name)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (safe_name,)).fetchone():
+            continue
+        
+        conn.execute(
+            f"""INSERT INTO transactions (accountId, date, description, amount, category, fingerprint, needsRules)
+            SELECT ?, date, description, amount, category, fingerprint, needsRules
+            FROM {safe_name} ORDER BY rowid""",
+            (account_id,)
+        )
+        conn.execute(f"DROP TABLE {safe_name}")
+    
+    conn.execute("CREATE INDEX transactions_account_date ON transactions (accountId, date)")
+    conn.execute("CREATE INDEX transactions_category ON transactions (category)")
+    conn.execute("CREATE UNIQUE INDEX transactions_fingerprint ON transactions (accountId, fingerprint)")
+    conn.execute("CREATE INDEX transactions_description ON transactions (accountId, description, category)")
+    conn.execute(
+        "CREATE INDEX transactions_needs_rules ON transactions (accountId, category, description) WHERE needsRules = 1"
+    )
+
+def migration_4_category_amount_index(conn):
+    # Covering index for the Budget Summary's GROUP BY category.
+    conn.execute("DROP INDEX IF EXISTS transactions_category")
+    conn.execute("CREATE INDEX transactions_category_amount ON transactions (category, amount)")
+
+def category_total_delta(row):
+    return f"""CASE
+        WHEN typeof({row}.amount) != 'integer' THEN 0
+        WHEN {row}.category = 'Please Select' THEN ABS({row}.amount)
+        ELSE {row}.amount
+    END"""
+
+def migration_5_category_totals(conn):
+    # Per-category totals kept current by triggers, so the Budget Summary
+    # reads one row per category instead of aggregating every transaction.
+    conn.execute('''CREATE TABLE categoryTotals (
+        category TEXT PRIMARY KEY,
+        cents INTEGER NOT NULL DEFAULT 0,
+        rowCount INTEGER NOT NULL DEFAULT 0
+    )''')
+    
+    add_new = f"""INSERT INTO categoryTotals (category, cents, rowCount)
+        VALUES (NEW.category, {category_total_delta('NEW')}, 1)
+        ON CONFLICT (category) DO UPDATE SET
+            cents = cents + excluded.cents,
+            rowCount = rowCount + 1;"""
+    remove_old = f"""UPDATE categoryTotals SET
+            cents = cents - {category_total_delta('OLD')},
+            rowCount = rowCount - 1
+        WHERE category = OLD.category;
+        DELETE FROM categoryTotals WHERE category = OLD.category AND rowCount <= 0;"""
+    
+    conn.execute(f"CREATE TRIGGER transactions_totals_insert AFTER INSERT ON transactions BEGIN {add_new} END")
+    conn.execute(f"CREATE TRIGGER transactions_totals_delete AFTER DELETE ON transactions BEGIN {remove_old} END")
+    conn.execute(
+        f"""CREATE TRIGGER transactions_totals_update AFTER UPDATE OF amount, category ON transactions
+        BEGIN {remove_old} {add_new} END"""
+    )
+    
+    rebuild_category_totals(conn)
+
+def migration_6_transaction_search(conn):
+    # Full-text index over descriptions. It stores no text of its own
+    # (content='transactions') and is kept in step by triggers.
+    conn.execute(
+        """CREATE VIRTUAL TABLE transactionSearch USING fts5(
+            description,
+            content='transactions',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )"""
+    )
+    
+    add_new = "INSERT INTO transactionSearch (rowid, description) VALUES (NEW.id, NEW.description);"
+    remove_old = """INSERT INTO transactionSearch (transactionSearch, rowid, description)
+        VALUES ('delete', OLD.id, OLD.description);"""
+    
+    conn.execute(f"CREATE TRIGGER transactions_search_insert AFTER INSERT ON transactions BEGIN {add_new} END")
+    conn.execute(f"CREATE TRIGGER transactions_search_delete AFTER DELETE ON transactions BEGIN {remove_old} END")
+    conn.execute(
+        f"""CREATE TRIGGER transactions_search_update AFTER UPDATE OF description ON transactions
+        BEGIN {remove_old} {add_new} END"""
+    )
+    
+    conn.execute("INSERT INTO transactionSearch (transactionSearch) VALUES ('rebuild')")
+
+def migration_7_transaction_view_indexes(conn):
+    # Indexes for the account view's sort orders (see TRANSACTION_ORDERS).
+    # Each is the account, the order's columns, then the implicit rowid, so
+    # a page is read in order straight from the index. The category index
+    # also answers "category X between two dates" on its own.
+    conn.execute("CREATE INDEX transactions_account ON transactions (accountId)")
+    conn.execute("CREATE INDEX transactions_account_amount ON transactions (accountId, amount)")
+    conn.execute("CREATE INDEX transactions_account_category ON transactions (accountId, category, date)")
+
+MIGRATIONS = [
+    (1, migration_1_upgrade_tables),
+    (2, migration_2_typed_columns),
+    (3, migration_3_transactions_table),
+    (4, migration_4_category_amount_index),
+    (5, migration_5_category_totals),
+    (6, migration_6_transaction_search),
+    (7, migration_7_transaction_view_indexes),
+]
+
+def to_cents(amount):
+    """Amount as an integer number of cents, e.g. '-12.50' -> -1250.
+    Values that are not numbers are returned unchanged."""
+    try:
+        value = Decimal(str(amount).strip())
+        return int((value * 100).to_integral_value(ROUND_HALF_UP))
+    except (InvalidOperation, ValueError, OverflowError):
+        return amount
+
+def format_amount(cents):
+    if isinstance(cents, int):
+        return f"{cents / 100:.2f}"
+    return cents
+
+def fingerprint_key(date, description, amount):
+    """Hash of a transaction's date (YYYYMMDD), whitespace-normalized
+    description and amount (cents). Stored fingerprints are '<key>:<n>'
+    where n counts identical rows, so genuine repeats on the same day are
+    kept apart."""
+    description = " ".join(str(description).split())
+    return hashlib.sha1(f"{date}|{description}|{amount}".encode()).hexdigest()[:16]
+
+def next_fingerprint(conn, account_id, key):
+    existing = conn.execute(
+        "SELECT fingerprint FROM transactions WHERE accountId = ? AND fingerprint >= ? AND fingerprint < ?",
+        (account_id, f"{key}:", f"{key};")
+    ).fetchall()
+    occurrence = max((int(fp[0].rsplit(':', 1)[1]) for fp in existing), default=0) + 1
+    return f"{key}:{occurrence}"
+
+@cached('category')
 def get_categories():
     result = execute_query("SELECT category FROM category", fetch=True)
     return tuple(cat[0] for cat in result) if result else ()
 
+@cached('categoryRules')
 def get_category_rules():
-    return execute_query("SELECT rowid, * FROM categoryRules", fetch=True) or []
+    return tuple(execute_query(
+        "SELECT rowid, ruleName, appliedTo, category, matchType, priority FROM categoryRules ORDER BY rowid",
+        fetch=True
+    ) or ())
 
+@cached('bankAccountNames')
 def get_bank_accounts():
-    return execute_query("SELECT * FROM bankAccountNames", fetch=True) or []
+    return tuple(execute_query("SELECT account FROM bankAccountNames ORDER BY id", fetch=True) or ())
+
+@cached('bankAccountNames')
+def get_account_ids():
+    """Read-only account name -> id mapping, shared by every caller."""
+    return types.MappingProxyType(dict(execute_query("SELECT account, id FROM bankAccountNames", fetch=True) or ()))
 
+def get_account_id(account_name, conn=None):
+    if conn is not None:
+        result = conn.execute("SELECT id FROM bankAccountNames WHERE account = ?", (account_name,)).fetchone()
+        account_id = result[0] if result else None
+    else:
+        account_id = get_account_ids().get(account_name)
+    if account_id is None:
+        raise ValueError(f"Unknown bank account: {account_name}")
+    return account_id
+
+@cached('options')
 def get_options():
-    return execute_query("SELECT * FROM options", fetch=True) or []
+    return tuple(execute_query("SELECT * FROM options", fetch=True) or ())
 
+@cached('ofxCsv')
 def get_ofx_csv_setting():
     result = execute_query("SELECT selected FROM ofxCsv", fetchone=True)
     return result[0] if result else 0
 
 def update_ofx_csv_setting(value):
     execute_query("UPDATE ofxCsv SET selected = ? WHERE id = ?", (value, 0))
+    read_cache.invalidate('ofxCsv')
 
 def get_bank_statement_data(account_name):
-    safe_name = sanitize_table_name(account_name)
-    return execute_query(f"SELECT rowid, * FROM {safe_name}", fetch=True) or []
+    return execute_query(
+        """SELECT id, date, description, amount, category FROM transactions
+        WHERE accountId = ? ORDER BY id""",
+        (get_account_id(account_name),),
+        fetch=True
+    ) or []
+
+def filter_date(value):
+    date = to_date_int(value)
+    if not isinstance(date, int):
+        raise ValueError(f"'{value}' is not a date")
+    return date
+
+def filter_amount(value):
+    cents = to_cents(value)
+    if not isinstance(cents, int):
+        raise ValueError(f"'{value}' is not an amount")
+    return cents
+
+def filter_text(value):
+    return search_query(value) or None
+
+# Filters accepted by query_transactions: name -> (condition, converter).
+TRANSACTION_FILTERS = {
+    'date_from': ("date >= ?", filter_date),
+    'date_to': ("date <= ?", filter_date),
+    'amount_min': ("amount >= ?", filter_amount),
+    'amount_max': ("amount <= ?", filter_amount),
+    'category': ("category = ?", str),
+    'text': ("id IN (SELECT rowid FROM transactionSearch WHERE transactionSearch MATCH ?)", filter_text),
+}
+
+# Sort orders for query_transactions: column -> the columns rows are
+# ordered by. Each matches an index on (accountId, columns...), whose
+# implicit rowid breaks the remaining ties.
+TRANSACTION_ORDERS = {
+    'id': ('id',),
+    'date': ('date', 'id'),
+    'description': ('description', 'category', 'id'),
+    'amount': ('amount', 'id'),
+    'category': ('category', 'date', 'id'),
+}
+
+# Positions of the columns in rows returned by query_transactions.
+TRANSACTION_COLUMNS = ('id', 'date', 'description', 'amount', 'category')
+
+def transaction_filters(filters):
+    """WHERE conditions and parameters for a dict of TRANSACTION_FILTERS.
+    Filters whose value is None or empty are left out."""
+    conditions = []
+    params = []
+    for name, value in (filters or {}).items():
+        if name not in TRANSACTION_FILTERS:
+            raise ValueError(f"Unknown transaction filter '{name}'")
+        if value is None or value == '':
+            continue
+        
+        condition, convert = TRANSACTION_FILTERS[name]
+        value = convert(value)
+        if value is None:
+            continue
+        conditions.append(condition)
+        params.append(value)
+    return conditions, params
+
+def transaction_key(row, order_by='id'):
+    """Keyset key of a query_transactions row, to pass as after."""
+    return tuple(row[TRANSACTION_COLUMNS.index(column)] for column in TRANSACTION_ORDERS[order_by])
+
+def query_transactions(account_name, filters=None, order_by='id', descending=False, after=None, limit=200, offset=0):
+    """One page of an account's transactions as (id, date, description,
+    amount, category), filtered and ordered in the database.
+    
+    after is the transaction_key of the last row of the previous page;
+    without it the page starts at offset."""
+    if order_by not in TRANSACTION_ORDERS:
+        raise ValueError(f"Cannot order transactions by '{order_by}'")
+    
+    conditions, params = transaction_filters(filters)
+    conditions.insert(0, "accountId = ?")
+    params.insert(0, get_account_id(account_name))
+    
+    columns = TRANSACTION_ORDERS[order_by]
+    direction = " DESC" if descending else ""
+    if after is not None:
+        conditions.append(
+            f"({', '.join(columns)}) {'<' if descending else '>'} ({', '.join('?' * len(columns))})"
+        )
+        params.extend(after)
+        offset = 0
+    
+    return execute_query(
+        f"""SELECT id, date, description, amount, category FROM transactions
+        WHERE {' AND '.join(conditions)}
+        ORDER BY {', '.join(column + direction for column in columns)}
+        LIMIT ? OFFSET ?""",
+        params + [limit, offset],
+        fetch=True
+    ) or []
+
+def count_transactions(account_name, filters=None):
+    conditions, params = transaction_filters(filters)
+    return execute_query(
+        f"SELECT COUNT(*) FROM transactions WHERE {' AND '.join(['accountId = ?'] + conditions)}",
+        [get_account_id(account_name)] + params,
+        fetchone=True
+    )[0]
+
+def search_query(text):
+    """FTS5 query matching descriptions that contain every word of text,
+    each as a word prefix, e.g. 'wool sup' -> '"wool"* "sup"*'."""
+    words = re.findall(r'\w+', text)
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_transactions(text, account_name=None, limit=SEARCH_LIMIT, offset=0, filters=None):
+    """Transactions whose description matches text, best match first, as
+    (id, account, date, description, amount, category). Searches every
+    account unless account_name is given; filters are TRANSACTION_FILTERS.
+    
+    Only the newest SEARCH_LIMIT matches are ranked, so a query that matches
+    most of the table costs no more than a specific one."""
+    query = search_query(text)
+    if not query:
+        return []
+    conditions, params = transaction_filters(filters)
+    
+    return execute_query(
+        f"""WITH hits AS ({search_hits_query(account_name, conditions)})
+        SELECT transactions.id, bankAccountNames.account, transactions.date,
+            transactions.description, transactions.amount, transactions.category
+        FROM hits
+        JOIN transactions ON transactions.id = hits.id
+        JOIN bankAccountNames ON bankAccountNames.id = transactions.accountId
+        ORDER BY hits.rank, transactions.date DESC
+        LIMIT ? OFFSET ?""",
+        search_hits_params(query, account_name) + params + [limit, offset],
+        fetch=True
+    ) or []
+
+def count_search_results(text, account_name=None, filters=None):
+    """How many matches search_transactions ranks, at most SEARCH_LIMIT;
+    count_transactions with a 'text' filter counts them all."""
+    query = search_query(text)
+    if not query:
+        return 0
+    conditions, params = transaction_filters(filters)
+    
+    return execute_query(
+        f"SELECT COUNT(*) FROM ({search_hits_query(account_name, conditions)})",
+        search_hits_params(query, account_name) + params,
+        fetchone=True
+    )[0]
+
+def search_hits_query(account_name, conditions=()):
+    # CROSS JOIN keeps the full-text index as the outer loop; otherwise the
+    # planner may walk the whole account and probe the index for each row.
+    conditions = (["transactions.accountId = ?"] if account_name else []) + list(conditions)
+    filters = "".join(f" AND {condition}" for condition in conditions)
+    return f"""SELECT transactionSearch.rowid AS id, transactionSearch.rank AS rank
+        FROM transactionSearch
+        CROSS JOIN transactions ON transactions.id = transactionSearch.rowid
+        WHERE transactionSearch MATCH ?{filters}
+        ORDER BY transactionSearch.rowid DESC
+        LIMIT {SEARCH_LIMIT}"""
+
+def search_hits_params(query, account_name):
+    return [query] + ([get_account_id(account_name)] if account_name else [])
 
 def add_category(category, budget='None'):
     execute_query("INSERT INTO category VALUES (?, ?)", (category.title(), budget))
+    read_cache.invalidate('category')
 
 def update_category(category, budget, oid):
     execute_query(
         "UPDATE category SET category = ?, budget = ? WHERE oid = ?",
         (category.title(), budget, oid)
     )
+    read_cache.invalidate('category')
 
 def delete_category(oid):
     execute_query("DELETE FROM category WHERE oid = ?", (oid,))
+    read_cache.invalidate('category')
 
-def add_category_rule(rule_name, applied_to, category):
-    execute_query(
-        "INSERT INTO categoryRules VALUES (?, ?, ?)",
-        (rule_name, applied_to, category)
-    )
+def bump_rules_version(conn):
+    conn.execute("UPDATE rulesVersion SET version = version + 1")
+    read_cache.invalidate('categoryRules')
 
-def update_category_rule(rule_name, applied_to, category, oid):
-    execute_query(
-        "UPDATE categoryRules SET ruleName = ?, appliedTo = ?, category = ? WHERE oid = ?",
-        (rule_name, applied_to, category, oid)
-    )
+def add_category_rule(rule_name, applied_to, category, match_type='exact', priority=0):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO categoryRules (ruleName, appliedTo, category, matchType, priority) VALUES (?, ?, ?, ?, ?)",
+            (rule_name, applied_to, category, match_type, priority)
+        )
+        bump_rules_version(conn)
+
+def update_category_rule(rule_name, applied_to, category, oid, match_type='exact', priority=0):
+    with transaction() as conn:
+        conn.execute(
+            "UPDATE categoryRules SET ruleName = ?, appliedTo = ?, category = ?, matchType = ?, priority = ? WHERE oid = ?",
+            (rule_name, applied_to, category, match_type, priority, oid)
+        )
+        bump_rules_version(conn)
 
 def delete_category_rule(oid):
-    execute_query("DELETE FROM categoryRules WHERE oid = ?", (oid,))
+    with transaction() as conn:
+        conn.execute("DELETE FROM categoryRules WHERE oid = ?", (oid,))
+        bump_rules_version(conn)
 
 def add_bank_account(account_name):
     safe_name = sanitize_table_name(account_name)
-    execute_query("INSERT INTO bankAccountNames VALUES (?)", (safe_name,))
-    with get_connection() as conn:
-        c = conn.cursor()
-        c.execute(f'''CREATE TABLE IF NOT EXISTS {safe_name} (
-            date TEXT,
-            description TEXT,
-            amount TEXT,
-            category TEXT
-        )''')
-        conn.commit()
+    try:
+        execute_query("INSERT INTO bankAccountNames (account) VALUES (?)", (safe_name,))
+    except sqlite3.IntegrityError:
+        raise ValueError(f"Bank account already exists: {safe_name}")
+    read_cache.invalidate('bankAccountNames')
 
 def delete_bank_account(account_name):
-    safe_name = sanitize_table_name(account_name)
-    with get_connection() as conn:
-        c = conn.cursor()
-        c.execute(f"DROP TABLE IF EXISTS {safe_name}")
-        c.execute("DELETE FROM bankAccountNames WHERE account = ?", (safe_name,))
-        conn.commit()
+    # Its transactions go with it through ON DELETE CASCADE.
+    execute_query("DELETE FROM bankAccountNames WHERE account = ?", (account_name,))
+    read_cache.invalidate('bankAccountNames')
 
 def add_transaction(account_name, date, description, amount, category='Please Select'):
-    safe_name = sanitize_table_name(account_name)
-    execute_query(
-        f"INSERT INTO {safe_name} VALUES (?, ?, ?, ?)",
-        (date, description, amount, category)
+    date, amount = to_date_int(date), to_cents(amount)
+    with transaction() as conn:
+        account_id = get_account_id(account_name, conn)
+        fingerprint = next_fingerprint(conn, account_id, fingerprint_key(date, description, amount))
+        conn.execute(
+            """INSERT INTO transactions (accountId, date, description, amount, category, fingerprint)
+            VALUES (?, ?, ?, ?, ?, ?)""",
+            (account_id, date, description, amount, category, fingerprint)
+        )
+
+def restage_dates(conn, parse_date):
+    """Read the staged dates again after a later chunk of the statement
+    changed its date format, e.g. from month-first to day-first."""
+    conn.create_function('statementDate', 1, parse_date, deterministic=True)
+    conn.create_function('transactionFingerprint', 3, fingerprint_key, deterministic=True)
+    conn.execute(
+        """UPDATE importStaging SET date = statementDate(rawDate),
+            fingerprintKey = transactionFingerprint(statementDate(rawDate), description, amount)"""
+    )
+
+def add_transactions(account_name, transactions, category='Please Select', on_chunk=None):
+    """Insert (date, description, amount) rows in a single transaction,
+    skipping rows whose fingerprint is already stored. Returns
+    (inserted, skipped); nothing is kept if any row fails.
+    
+    transactions can be any iterable, e.g. a generator reading a file. Rows
+    are staged IMPORT_CHUNK_SIZE at a time in a temporary table, so memory
+    stays flat however large the statement is. on_chunk(rows_staged) is
+    called after each chunk; an exception raised from it aborts the import."""
+    with transaction() as conn:
+        account_id = get_account_id(account_name, conn)
+        
+        conn.execute(
+            """CREATE TEMP TABLE IF NOT EXISTS importStaging (
+                seq INTEGER PRIMARY KEY, rawDate, date, description TEXT, amount, fingerprintKey TEXT
+            )"""
+        )
+        conn.execute("DELETE FROM importStaging")
+        
+        staged = 0
+        rows = iter(transactions)
+        parse_date = DateParser()
+        while True:
+            chunk = []
+            raw = list(itertools.islice(rows, IMPORT_CHUNK_SIZE))
+            if not raw:
+                break
+            if parse_date.learn(row[0] for row in raw) and staged:
+                restage_dates(conn, parse_date)
+            
+            for raw_date, description, amount in raw:
+                date, amount = parse_date(raw_date), to_cents(amount)
+                chunk.append((raw_date, date, description, amount, fingerprint_key(date, description, amount)))
+            
+            conn.executemany(
+                "INSERT INTO importStaging (rawDate, date, description, amount, fingerprintKey) VALUES (?, ?, ?, ?, ?)",
+                chunk
+            )
+            staged += len(chunk)
+            if on_chunk:
+                on_chunk(staged)
+        
+        if not staged:
+            return 0, 0
+        
+        # Identical rows within one statement are numbered in file order, as
+        # in the '<key>:<n>' fingerprints described in fingerprint_key.
+        inserted = conn.execute(
+            """INSERT OR IGNORE INTO transactions (accountId, date, description, amount, category, fingerprint)
+            SELECT ?, date, description, amount, ?,
+                fingerprintKey || ':' || ROW_NUMBER() OVER (PARTITION BY fingerprintKey ORDER BY seq)
+            FROM importStaging ORDER BY seq""",
+            (account_id, category)
+        ).rowcount
+        conn.execute("DELETE FROM importStaging")
+    
+    return inserted, staged - inserted
+
+def account_needs_rules(account_name):
+    """True when the account has rows imported or edited since the last
+    rules pass, or the rule set changed since then."""
+    result = execute_query(
+        """SELECT
+            rulesVersion IS NOT (SELECT version FROM rulesVersion)
+            OR EXISTS (SELECT 1 FROM transactions WHERE accountId = bankAccountNames.id AND needsRules = 1)
+        FROM bankAccountNames WHERE account = ?""",
+        (account_name,),
+        fetchone=True
+    )
+    return bool(result and result[0])
+
+def apply_category_rules(account_name, match_description):
+    """Apply category rules to an account in one transaction. Descriptions
+    with a row in 'Delete' are removed, then every row sharing a description
+    with an uncategorized row gets match_description(description), unless
+    that returns None.
+    
+    Only rows flagged needsRules are considered, unless the rule set has
+    changed since the account's last pass, in which case all rows are."""
+    with transaction() as conn:
+        version = conn.execute("SELECT version FROM rulesVersion").fetchone()[0]
+        account_id, stamp = conn.execute(
+            "SELECT id, rulesVersion FROM bankAccountNames WHERE account = ?",
+            (account_name,)
+        ).fetchone()
+        dirty_only = "AND needsRules = 1" if stamp == version else ""
+        
+        if match_description:
+            apply_rule_matches(conn, account_id, match_description, dirty_only)
+        
+        # Rows a rule has just moved to 'Delete' stay flagged so the next
+        # pass removes them, as a full rescan would.
+        conn.execute(
+            "UPDATE transactions SET needsRules = 0 WHERE accountId = ? AND needsRules = 1 AND category != 'Delete'",
+            (account_id,)
+        )
+        conn.execute("UPDATE bankAccountNames SET rulesVersion = ? WHERE id = ?", (version, account_id))
+
+def apply_rule_matches(conn, account_id, match_description, dirty_only):
+    conn.execute(
+        f"""DELETE FROM transactions WHERE accountId = ? AND description IN (
+            SELECT description FROM transactions
+            WHERE accountId = ? AND category = 'Delete' {dirty_only}
+        )""",
+        (account_id, account_id)
+    )
+    
+    candidates = conn.execute(
+        f"""SELECT DISTINCT description FROM transactions
+        WHERE accountId = ? AND category = 'Please Select' {dirty_only}""",
+        (account_id,)
+    ).fetchall()
+    
+    rule_lookup = []
+    for (description,) in candidates:
+        category = match_description(description)
+        if category is not None:
+            rule_lookup.append((description, category))
+    
+    if not rule_lookup:
+        return
+    
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS ruleLookup (description TEXT PRIMARY KEY, category TEXT)")
+    conn.execute("DELETE FROM temp.ruleLookup")
+    conn.executemany("INSERT INTO temp.ruleLookup VALUES (?, ?)", rule_lookup)
+    
+    conn.execute(
+        """UPDATE transactions SET category = ruleLookup.category, needsRules = 1
+        FROM temp.ruleLookup
+        WHERE transactions.accountId = ? AND transactions.description = ruleLookup.description""",
+        (account_id,)
     )
 
 def update_transaction(account_name, date, description, amount, category, oid):
-    safe_name = sanitize_table_name(account_name)
     execute_query(
-        f"UPDATE {safe_name} SET date = ?, description = ?, amount = ?, category = ? WHERE oid = ?",
-        (date, description, amount, category, oid)
+        """UPDATE transactions SET date = ?, description = ?, amount = ?, category = ?, needsRules = 1
+        WHERE id = ? AND accountId = ?""",
+        (to_date_int(date), description, to_cents(amount), category, oid, get_account_id(account_name))
     )
 
 def delete_transaction(account_name, oid):
-    safe_name = sanitize_table_name(account_name)
-    execute_query(f"DELETE FROM {safe_name} WHERE oid = ?", (oid,))
+    execute_query(
+        "DELETE FROM transactions WHERE id = ? AND accountId = ?",
+        (oid, get_account_id(account_name))
+    )
 
 def update_options(date_col, amount_col, desc_col):
     execute_query(
         "UPDATE options SET date = ?, amount = ?, description = ? WHERE id = ?",
         (date_col, amount_col, desc_col, 0)
     )
+    read_cache.invalidate('options')
 
 def get_all_transactions():
-    bank_accounts = get_bank_accounts()
-    all_records = []
+    return execute_query("SELECT amount, category FROM transactions", fetch=True) or []
+
+def get_category_summary():
+    """Budget Summary rows as (category, total, budget), sorted by category.
+    Every category appears, 'Please Select' is reported as 'Uncategorized'
+    and summed by absolute value, and totals are in dollars. Empty when
+    there are no transactions at all."""
+    return execute_query(
+        """WITH budgets AS (
+            SELECT category, budget, MIN(rowid) FROM category GROUP BY category
+        ),
+        names AS (
+            SELECT category FROM budgets
+            UNION SELECT category FROM categoryTotals
+            UNION SELECT 'Please Select'
+        )
+        SELECT
+            CASE WHEN names.category = 'Please Select' THEN 'Uncategorized' ELSE names.category END AS name,
+            COALESCE(categoryTotals.cents, 0) / 100.0,
+            COALESCE(budgets.budget, 'None')
+        FROM names
+        LEFT JOIN categoryTotals ON categoryTotals.category = names.category
+        LEFT JOIN budgets ON budgets.category = names.category
+        WHERE EXISTS (SELECT 1 FROM categoryTotals)
+        ORDER BY name""",
+        fetch=True
+    ) or []
+
+def get_account_stats():
+    """(account, transactions, uncategorized, first date, last date) for
+    every account, sorted by name. Dates are None for empty accounts."""
+    rows = execute_query(
+        """SELECT account, COUNT(transactions.id),
+            COUNT(CASE WHEN transactions.category = 'Please Select' THEN 1 END),
+            MIN(transactions.date), MAX(transactions.date)
+        FROM bankAccountNames
+        LEFT JOIN transactions ON transactions.accountId = bankAccountNames.id
+        GROUP BY bankAccountNames.id
+        ORDER BY account""",
+        fetch=True
+    ) or []
+    return [
+        (account, count, uncategorized, format_date(first), format_date(last))
+        for account, count, uncategorized, first, last in rows
+    ]
+
+def count_category_totals(conn):
+    return conn.execute(
+        f"""SELECT category, TOTAL({category_total_delta('transactions')}), COUNT(*)
+        FROM transactions GROUP BY category"""
+    ).fetchall()
+
+def check_category_totals():
+    """Compare categoryTotals with a full recount of transactions. Returns
+    (category, stored cents, actual cents) for every category that differs."""
+    with transaction() as conn:
+        actual = {category: (int(cents), count) for category, cents, count in count_category_totals(conn)}
+        stored = {
+            category: (cents, count)
+            for category, cents, count in conn.execute("SELECT category, cents, rowCount FROM categoryTotals")
+        }
     
-    for acc in bank_accounts:
-        acc_name = acc[0]
-        safe_name = sanitize_table_name(acc_name)
-        records = execute_query(f"SELECT amount, category FROM {safe_name}", fetch=True)
-        if records:
-            all_records.extend(records)
+    mismatches = []
+    for category in sorted(set(actual) | set(stored), key=str):
+        if actual.get(category) != stored.get(category):
+            mismatches.append((category, stored.get(category, (0, 0))[0], actual.get(category, (0, 0))[0]))
+    return mismatches
+
+def rebuild_category_totals(conn=None):
+    if conn is None:
+        with transaction() as conn:
+            return rebuild_category_totals(conn)
     
-    return all_records
+    conn.execute("DELETE FROM categoryTotals")
+    conn.executemany(
+        "INSERT INTO categoryTotals (category, cents, rowCount) VALUES (?, ?, ?)",
+        [(category, int(cents), count) for category, cents, count in count_category_totals(conn)]
+    )
 
+@cached('category')
 def get_all_categories_with_budget():
-    return execute_query("SELECT * FROM category", fetch=True) or []
+    return tuple(execute_query("SELECT * FROM category", fetch=True) or ())
@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Tried in order when detecting a statement's date format. Month-first comes
+# before day-first so ambiguous dates read the way dateutil reads them.
+DATE_FORMATS = (
+    '%Y%m%d',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%m/%d/%Y',
+    '%d/%m/%Y',
+    '%m-%d-%Y',
+    '%d-%m-%Y',
+    '%d.%m.%Y',
+    '%m%d%Y',
+    '%d%m%Y',
+    '%m/%d/%y',
+    '%d/%m/%y',
+    '%d %b %Y',
+    '%d %B %Y',
+    '%b %d, %Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+)
+
+
+def parses(text, date_format):
+    try:
+        datetime.strptime(text, date_format)
+    except ValueError:
+        return False
+    return True
+
+
+def day_first(date_format):
+    """True when date_format puts the day before the month."""
+    day = date_format.find('%d')
+    month = min((date_format.find(code) for code in ('%m', '%b', '%B') if code in date_format), default=-1)
+    return 0 <= day < month
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text, dayfirst=False):
+    """Date text as an integer YYYYMMDD, falling back to dateutil for
+    formats that are not recognised. Returns None if it is not a date."""
+    if len(text) == 8 and text.isdigit() and parses(text, '%Y%m%d'):
+        return int(text)
+    if len(text) == 10 and text[4] == '-' and text[7] == '-' and text[:4].isdigit():
+        try:
+            return int(datetime.strptime(text, '%Y-%m-%d').strftime('%Y%m%d'))
+        except ValueError:
+            pass
+    
+    from dateutil import parser
+    try:
+        return int(parser.parse(text, dayfirst=dayfirst).strftime('%Y%m%d'))
+    except (OverflowError, ValueError):
+        return None
+
+
+def to_date_int(date):
+    """Date as an integer YYYYMMDD. Values that cannot be read as a date are
+    returned unchanged."""
+    if isinstance(date, int):
+        return date
+    result = parse_date(str(date).strip())
+    return date if result is None else result
+
+
+class DateParser:
+    """to_date_int for the dates of one statement.
+    
+    The format is the first of DATE_FORMATS that every date learned so far
+    parses with, so a day-first statement is read day-first as soon as one
+    of its dates has a day over 12, wherever that date is. Each distinct
+    date string is parsed once. Dates that fit none of the remaining
+    formats go through dateutil, reading day and month in the statement's
+    order."""
+    
+    def __init__(self, dates=()):
+        self.formats = DATE_FORMATS
+        self.learned = set()
+        self.parsed = {}
+        self.learn(dates)
+    
+    @property
+    def date_format(self):
+        return self.formats[0] if self.formats else None
+    
+    def learn(self, dates):
+        """Narrow the format down with more of the statement's dates.
+        Returns True when the format changed, so dates that were already
+        converted may have been read the wrong way round."""
+        before = self.date_format
+        for date in dates:
+            text = str(date).strip()
+            if isinstance(date, int) or not text or text in self.learned:
+                continue
+            self.learned.add(text)
+            formats = tuple(date_format for date_format in self.formats if parses(text, date_format))
+            if formats:
+                self.formats = formats
+        
+        if self.date_format == before:
+            return False
+        self.parsed = {}
+        return True
+    
+    def parse(self, text):
+        if text in self.parsed:
+            return self.parsed[text]
+        
+        date_format = self.date_format
+        result = None
+        if date_format:
+            try:
+                date = datetime.strptime(text, date_format)
+                result = date.year * 10000 + date.month * 100 + date.day
+            except ValueError:
+                pass
+        if result is None:
+            result = parse_date(text, bool(date_format) and day_first(date_format))
+        self.parsed[text] = result
+        return result
+    
+    def __call__(self, date):
+        if isinstance(date, int):
+            return date
+        result = self.parse(str(date).strip())
+        return date if result is None else result
+
+
+@lru_cache(maxsize=8192)
+def format_date(date):
+    """YYYYMMDD integer as 'YYYY-MM-DD' for display."""
+    if isinstance(date, int):
+        return f"{date // 10000:04d}-{date // 100 % 100:02d}-{date % 100:02d}"
+    return date
+
+
+PERIODS = ('All', 'This Month', 'Last Month', 'Last 90 Days', 'This Year')
+
+
+def period_range(period, today=None):
+    """(first, last) dates of one of PERIODS as 'YYYY-MM-DD' strings, or
+    ('', '') for 'All'."""
+    today = today or date.today()
+    if period == 'This Month':
+        first, last = today.replace(day=1), today
+    elif period == 'Last Month':
+        last = today.replace(day=1) - timedelta(days=1)
+        first = last.replace(day=1)
+    elif period == 'Last 90 Days':
+        first, last = today - timedelta(days=90), today
+    elif period == 'This Year':
+        first, last = today.replace(month=1, day=1), today
+    else:
+        return '', ''
+    return first.isoformat(), last.isoformat()
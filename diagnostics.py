@@ -0,0 +1,183 @@
+import sqlite3
+import time
+import tkinter
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from tkinter import messagebox
+from tkinter.filedialog import asksaveasfilename
+import database as db
+import query_stats
+from theme import TableBinding, create_styled_treeview, create_button, create_entry, create_label
+
+
+class QueryDiagnostics(ttk.Toplevel):
+    """Statement timings recorded by query_stats: totals per statement,
+    the slow query log, and the query plan of a selected statement."""
+    
+    def __init__(self, parent):
+        super().__init__(parent.winfo_toplevel())
+        self.title("Query Diagnostics")
+        self.geometry("1000x650")
+        
+        self.statement_ids = {}
+        self.statements = {}
+        self.slow_queries = {}
+        
+        frame = ttk.Frame(self, padding=20)
+        frame.pack(fill=BOTH, expand=True)
+        
+        control_frame = ttk.Frame(frame)
+        control_frame.pack(fill=X, pady=(0, 10))
+        
+        self.recording = tkinter.BooleanVar(value=query_stats.stats.enabled)
+        ttk.Checkbutton(
+            control_frame, text="Record queries", variable=self.recording,
+            command=self.toggle_recording, bootstyle="round-toggle"
+        ).pack(side=LEFT, padx=(0, 20))
+        
+        create_label(control_frame, text="Slow query (ms):").pack(side=LEFT, padx=(0, 5))
+        self.slow_entry = create_entry(control_frame, width=8)
+        self.slow_entry.insert(0, f"{query_stats.stats.slow_ms:g}")
+        self.slow_entry.pack(side=LEFT)
+        self.slow_entry.bind('<Return>', lambda event: self.set_slow_ms())
+        
+        columns = ("Calls", "Rows", "Total ms", "Avg ms", "Max ms", "Statement")
+        widths = (60, 80, 80, 70, 70, 600)
+        tree_frame, self.statement_tree = create_styled_treeview(frame, columns, widths)
+        tree_frame.pack(fill=BOTH, expand=True, pady=(0, 10))
+        self.statement_binding = TableBinding(self.statement_tree, row_values=lambda row: row[1:])
+        self.statement_tree.bind('<<TreeviewSelect>>', lambda event: self.show_statement())
+        
+        columns = ("ms", "Rows", "Time", "Called From", "Statement")
+        widths = (70, 60, 70, 220, 540)
+        tree_frame, self.slow_tree = create_styled_treeview(frame, columns, widths)
+        tree_frame.pack(fill=BOTH, expand=True, pady=(0, 10))
+        self.slow_binding = TableBinding(self.slow_tree, row_values=lambda row: row[1:])
+        self.slow_tree.bind('<<TreeviewSelect>>', lambda event: self.show_slow_query())
+        
+        self.details = ttk.Text(frame, height=8, wrap='none')
+        self.details.pack(fill=X, pady=(0, 10))
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=X)
+        
+        create_button(button_frame, text="Refresh", command=self.load_data, bootstyle="primary").pack(side=LEFT, padx=5)
+        create_button(button_frame, text="Explain Selected", command=self.explain_selected, bootstyle="info").pack(side=LEFT, padx=5)
+        create_button(button_frame, text="Save Report", command=self.save_report, bootstyle="success").pack(side=LEFT, padx=5)
+        create_button(button_frame, text="Reset", command=self.reset, bootstyle="danger").pack(side=LEFT, padx=5)
+        create_button(button_frame, text="Close", command=self.destroy, bootstyle="secondary").pack(side=LEFT, padx=5)
+        
+        self.load_data()
+    
+    def load_data(self):
+        statements, slow = query_stats.stats.snapshot()
+        
+        rows = []
+        self.statements = {}
+        for entry in statements:
+            key = self.statement_ids.setdefault(entry.sql, len(self.statement_ids))
+            self.statements[str(key)] = entry
+            rows.append((
+                key, entry.calls, entry.rows, f"{entry.total_ms:.1f}",
+                f"{entry.average_ms:.2f}", f"{entry.max_ms:.1f}", entry.sql
+            ))
+        self.statement_binding.render(rows)
+        
+        self.slow_queries = {str(id(query)): query for query in slow}
+        self.slow_binding.render(
+            (id(query), f"{query.ms:.1f}", query.rows, time.strftime('%H:%M:%S', time.localtime(query.time)),
+             query.stack[-1] if query.stack else '', " ".join(query.sql.split()))
+            for query in slow
+        )
+    
+    def selected(self):
+        """(sql, params) of the selected slow query or statement."""
+        selection = self.slow_tree.selection()
+        if selection and selection[0] in self.slow_queries:
+            query = self.slow_queries[selection[0]]
+            return query.sql, query.params
+        
+        selection = self.statement_tree.selection()
+        if selection and selection[0] in self.statements:
+            return self.statements[selection[0]].sample
+        return None
+    
+    def show_details(self, lines):
+        self.details.delete('1.0', END)
+        self.details.insert(END, "\n".join(lines))
+    
+    def show_statement(self):
+        selection = self.statement_tree.selection()
+        if not selection or selection[0] not in self.statements:
+            return
+        self.slow_tree.selection_remove(*self.slow_tree.selection())
+        sql, params = self.statements[selection[0]].sample
+        self.show_details([" ".join(sql.split()), f"params: {params!r}"])
+    
+    def show_slow_query(self):
+        selection = self.slow_tree.selection()
+        if not selection or selection[0] not in self.slow_queries:
+            return
+        self.statement_tree.selection_remove(*self.statement_tree.selection())
+        query = self.slow_queries[selection[0]]
+        self.show_details(
+            [" ".join(query.sql.split()), f"params: {query.params!r}", f"thread: {query.thread}"]
+            + [f"at {frame}" for frame in reversed(query.stack)]
+        )
+    
+    def explain_selected(self):
+        selected = self.selected()
+        if selected is None:
+            messagebox.showwarning('Required', 'Select a statement first', parent=self)
+            return
+        
+        sql, params = selected
+        if params is None:
+            self.show_details(["No plan: the statement ran with several parameter sets."])
+            return
+        try:
+            plan = db.explain_query_plan(sql, params)
+        except sqlite3.Error as e:
+            plan = [f"No plan: {e}"]
+        self.show_details([" ".join(sql.split()), ""] + (plan or ["No plan for this statement."]))
+    
+    def set_slow_ms(self):
+        try:
+            slow_ms = float(self.slow_entry.get())
+        except ValueError:
+            messagebox.showerror('Error', 'Slow query threshold must be a number of milliseconds', parent=self)
+            return False
+        query_stats.stats.slow_ms = slow_ms
+        return True
+    
+    def toggle_recording(self):
+        if self.recording.get():
+            if not self.set_slow_ms():
+                self.recording.set(False)
+                return
+            db.enable_query_stats()
+        else:
+            db.disable_query_stats()
+        self.load_data()
+    
+    def reset(self):
+        query_stats.stats.reset()
+        self.statement_ids = {}
+        self.show_details([])
+        self.load_data()
+    
+    def save_report(self):
+        file = asksaveasfilename(
+            parent=self,
+            title='Save Query Report',
+            defaultextension='.txt',
+            filetypes=(('Text files', '*.txt'), ('All files', '*.*'))
+        )
+        if not file:
+            return
+        try:
+            db.dump_query_stats(file)
+        except OSError as e:
+            messagebox.showerror('Error', f'Could not save the report: {e}', parent=self)
+            return
+        messagebox.showinfo('Saved', f'Query report saved to {file}', parent=self)
@@ -12,7 +12,6 @@ import sys
 REQUIRED_PACKAGES = [
     "ttkbootstrap",
     "python-dateutil", 
-    "pandas",
     "ofxtools",
     "pillow",
 ]
@@ -67,7 +66,6 @@ def verify_imports():
     checks = [
         ("ttkbootstrap", "ttkbootstrap"),
         ("python-dateutil", "dateutil"),
-        ("pandas", "pandas"),
         ("ofxtools", "ofxtools"),
         ("pillow", "PIL"),
     ]
@@ -0,0 +1,133 @@
+import queue
+import threading
+import ttkbootstrap as ttk
+from ttkbootstrap.constants import *
+from tkinter import messagebox
+from theme import create_button, create_label
+
+
+POLL_MS = 50
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle passed to work running on the worker thread. Work reports
+    progress with progress() and calls check() wherever it is safe to stop;
+    check() raises JobCancelled once the user has cancelled."""
+    
+    def __init__(self):
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+    
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+    
+    def cancel(self):
+        self._cancel.set()
+    
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+    
+    def progress(self, done, total=None, message=None):
+        self.events.put(('progress', (done, total, message)))
+
+
+class JobDialog(ttk.Toplevel):
+    """Modal progress window for one background job.
+    
+    work(job) runs on a worker thread and must not touch Tk. Its progress,
+    result or exception come back through the job's queue, which is drained
+    with after() so on_done(result) and on_error(error) run on the Tk thread.
+    Database writes from the worker go through the database module's
+    serialized writer, while the UI keeps reading from its own connection."""
+    
+    def __init__(self, parent, title, work, on_done=None, on_error=None):
+        super().__init__(parent.winfo_toplevel())
+        self.title(title)
+        self.geometry("380x140")
+        self.transient(parent.winfo_toplevel())
+        self.grab_set()
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        self.job = Job()
+        self.on_done = on_done
+        self.on_error = on_error or show_job_error
+        
+        frame = ttk.Frame(self, padding=20)
+        frame.pack(fill=BOTH, expand=True)
+        
+        self.message = create_label(frame, text=f"{title}...")
+        self.message.pack(anchor=W)
+        
+        self.progress = ttk.Progressbar(frame, mode='indeterminate', bootstyle="info-striped")
+        self.progress.pack(fill=X, pady=10)
+        self.progress.start()
+        
+        self.cancel_button = create_button(frame, text="Cancel", command=self.cancel, bootstyle="secondary")
+        self.cancel_button.pack()
+        
+        self.worker = threading.Thread(target=self.run, args=(work,), daemon=True)
+        self.worker.start()
+        self.after(POLL_MS, self.poll)
+    
+    def run(self, work):
+        try:
+            result = work(self.job)
+        except BaseException as error:
+            self.job.events.put(('error', error))
+        else:
+            self.job.events.put(('done', result))
+    
+    def cancel(self):
+        self.job.cancel()
+        self.message.configure(text="Cancelling...")
+        self.cancel_button.configure(state='disabled')
+    
+    def poll(self):
+        try:
+            while True:
+                kind, value = self.job.events.get_nowait()
+                if kind == 'progress':
+                    self.show_progress(*value)
+                else:
+                    self.finish(kind, value)
+                    return
+        except queue.Empty:
+            pass
+        self.after(POLL_MS, self.poll)
+    
+    def show_progress(self, done, total, message):
+        if message and not self.job.cancelled:
+            self.message.configure(text=message)
+        if total:
+            if str(self.progress['mode']) != 'determinate':
+                self.progress.stop()
+                self.progress.configure(mode='determinate')
+            self.progress.configure(maximum=total, value=done)
+    
+    def finish(self, kind, value):
+        self.progress.stop()
+        self.grab_release()
+        self.destroy()
+        
+        if kind == 'done':
+            if self.on_done:
+                self.on_done(value)
+        elif isinstance(value, JobCancelled):
+            messagebox.showinfo('Cancelled', 'The operation was cancelled')
+        else:
+            self.on_error(value)
+
+
+def show_job_error(error):
+    messagebox.showerror('Error', str(error))
+
+
+def run_job(parent, title, work, on_done=None, on_error=None):
+    """Run work(job) off the Tk thread behind a progress dialog."""
+    return JobDialog(parent, title, work, on_done, on_error)
@@ -1,12 +1,15 @@
+import multiprocessing
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinter import messagebox
 import database as db
-from theme import THEME_NAME, create_styled_treeview, create_button, create_entry, create_label, create_labelframe, configure_treeview_style
+from theme import THEME_NAME, TableBinding, create_styled_treeview, create_button, create_entry, create_label, create_labelframe, configure_treeview_style
 from categories import Categories
 from category_rules import CategoryRules
 from bank_statement_recon import BankStatementRecon
 from accounts import Accounts
+from batch_import import batch_import, choose_statement_files, choose_statement_folder
+from diagnostics import QueryDiagnostics
 
 
 class Options(ttk.Frame):
@@ -99,6 +102,12 @@ class Options(ttk.Frame):
         save_btn = create_button(csv_frame, text="Save Settings", command=save_csv_options)
         save_btn.pack(pady=15)
         
+        maintenance_frame = create_labelframe(left_frame, text="Maintenance")
+        maintenance_frame.pack(fill=X, pady=(20, 0))
+        
+        create_button(maintenance_frame, text="Check Budget Totals", command=self.check_totals, bootstyle="secondary").pack()
+        create_button(maintenance_frame, text="Query Diagnostics", command=lambda: QueryDiagnostics(self), bootstyle="secondary").pack(pady=(10, 0))
+        
         options = db.get_options()
         if options:
             opt = options[0]
@@ -116,6 +125,7 @@ class Options(ttk.Frame):
         widths = (60, 200)
         tree_frame, self.bank_tree = create_styled_treeview(bank_frame, columns, widths)
         tree_frame.pack(fill=BOTH, expand=True, pady=(0, 15))
+        self.bank_binding = TableBinding(self.bank_tree, key=lambda row: row[1])
         
         add_frame = ttk.Frame(bank_frame)
         add_frame.pack(fill=X)
@@ -148,16 +158,27 @@ class Options(ttk.Frame):
         add_btn = create_button(add_frame, text="Add Account", command=add_bank_account, bootstyle="success")
         add_btn.pack(side=LEFT)
         
+        batch_frame = ttk.Frame(bank_frame)
+        batch_frame.pack(fill=X, pady=(15, 0))
+        
+        create_label(batch_frame, text="Batch Import:").pack(side=LEFT, padx=(0, 10))
+        create_button(batch_frame, text="Statement Files", command=lambda: batch_import(self, choose_statement_files()), bootstyle="primary").pack(side=LEFT, padx=(0, 10))
+        create_button(batch_frame, text="Statement Folder", command=lambda: batch_import(self, choose_statement_folder()), bootstyle="primary").pack(side=LEFT)
+        
         self.load_bank_accounts()
     
     def load_bank_accounts(self):
-        for item in self.bank_tree.get_children():
-            self.bank_tree.delete(item)
-        
         accounts = db.get_bank_accounts()
-        for i, acc in enumerate(accounts):
-            tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-            self.bank_tree.insert('', 'end', values=(i + 1, acc[0]), tags=(tag,))
+        self.bank_binding.render((i + 1, acc[0]) for i, acc in enumerate(accounts))
+    
+    def check_totals(self):
+        mismatches = db.check_category_totals()
+        
+        if not mismatches:
+            messagebox.showinfo('Budget Totals', 'Budget totals match all transactions.')
+        elif messagebox.askyesno('Budget Totals', f'{len(mismatches)} categories have out-of-date totals. Rebuild them now?'):
+            db.rebuild_category_totals()
+            messagebox.showinfo('Budget Totals', 'Budget totals have been rebuilt.')
     
     def refresh(self):
         self.load_bank_accounts()
@@ -187,6 +208,7 @@ class ExpenseTrackerApp:
         
         self.bank_tabs = {}
         self.bank_acc_created = []
+        self.current_bank_tab = None
         self.add_bank_tabs()
         
         self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_change)
@@ -206,19 +228,27 @@ class ExpenseTrackerApp:
         selected_idx = self.notebook.index('current')
         tab_name = self.notebook.tab(selected_idx, 'text').strip()
         
+        bank_tab = self.bank_tabs.get(tab_name) if selected_idx > 3 else None
+        if self.current_bank_tab is not None and self.current_bank_tab is not bank_tab:
+            if self.current_bank_tab.winfo_exists():
+                self.current_bank_tab.release()
+        self.current_bank_tab = bank_tab
+        
         if selected_idx == 0:
             self.options_tab.refresh()
         elif selected_idx == 2:
             self.rules_tab.refresh()
         elif selected_idx == 3:
             self.accounts_tab.refresh()
-        elif selected_idx > 3 and tab_name in self.bank_tabs:
-            self.bank_tabs[tab_name].refresh()
+        elif bank_tab is not None:
+            bank_tab.refresh()
     
     def run(self):
         self.root.mainloop()
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    db.enable_query_stats_from_environment()
     app = ExpenseTrackerApp()
     app.run()
@@ -0,0 +1,128 @@
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+from xml.sax import saxutils
+
+CHUNK_SIZE = 65536
+
+# How much of the file is read to find <OFX> and the CHARSET header.
+HEADER_SIZE = 65536
+
+# STMTTRN elements that are read. Elements with the same name inside the
+# nested aggregates below (e.g. PAYEE's NAME) belong to those aggregates.
+FIELDS = ('DTPOSTED', 'TRNAMT', 'MEMO', 'NAME')
+NESTED = {'PAYEE', 'BANKACCTTO', 'CCACCTTO', 'CURRENCY', 'ORIGCURRENCY', 'IMAGEDATA'}
+
+# OFXv1 CHARSET header values, as mapped by ofxtools.
+CODECS = {'ISO-8859-1': 'latin_1', '1252': 'cp1252', 'NONE': 'utf_8'}
+
+ENTITIES = {'&nbsp;': ' ', '&apos;': "'", '&quot;': '"'}
+
+TAG = re.compile(r'<([^<>]*)>([^<]*)')
+
+DATE = re.compile(
+    r'^(\d{4})(\d{2})(\d{2})'
+    r'(?:(\d{2})(\d{2})(?:(\d{2})(?:\.\d{3})?)?)?'
+    r'(?:\[([0-9+-]+)(?:.(\d\d))?(?::(.*))?\])?$'
+)
+
+
+class OFXStreamError(ValueError):
+    pass
+
+
+def detect_codec(head):
+    """Codec for the message body, from the first bytes of the file."""
+    text = head.decode('ascii', errors='replace')
+    if text.lstrip().startswith('<?xml'):
+        return 'utf_8'
+    match = re.search(r'CHARSET:\s*(\S+)', text)
+    return CODECS.get(match.group(1).upper(), 'utf_8') if match else 'utf_8'
+
+
+def iter_transactions(file):
+    """Yield a dict of the FIELDS present in each STMTTRN, across every
+    statement in the file, reading it a chunk at a time."""
+    with open(file, 'rb') as source:
+        head = source.read(HEADER_SIZE)
+    if b'<OFX>' not in head.upper():
+        raise OFXStreamError(f"{file} does not look like an OFX file")
+    
+    with open(file, encoding=detect_codec(head), errors='replace', newline='') as handle:
+        fields = None
+        nested = 0
+        buffer = ''
+        
+        while True:
+            chunk = handle.read(CHUNK_SIZE)
+            buffer += chunk
+            # Leave a tag that may be cut off for the next chunk.
+            end = buffer.rfind('<') if chunk else len(buffer)
+            if end <= 0 and chunk:
+                continue
+            
+            for match in TAG.finditer(buffer, 0, end):
+                tag = match.group(1).upper()
+                if fields is None:
+                    if tag == 'STMTTRN':
+                        fields = {}
+                        nested = 0
+                elif tag == '/STMTTRN':
+                    yield fields
+                    fields = None
+                elif tag in NESTED:
+                    nested += 1
+                elif tag.startswith('/'):
+                    if tag[1:] in NESTED:
+                        nested -= 1
+                elif not nested and tag in FIELDS:
+                    value = match.group(2).strip()
+                    fields[tag] = saxutils.unescape(value, ENTITIES) if '&' in value else value
+            
+            buffer = buffer[end:]
+            if not chunk:
+                break
+
+
+def to_utc_date(text):
+    """OFX datetime as a YYYYMMDD string of its UTC date, which is the date
+    ofxtools gives for the same value."""
+    match = DATE.match(text)
+    if match is None:
+        raise OFXStreamError(f"'{text}' is not an OFX date")
+    
+    year, month, day, hour, minute, second, hours, minutes, tz_name = match.groups()
+    value = datetime.datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    
+    if hours:
+        try:
+            offset_hours = int(hours)
+        except ValueError:
+            from ofxtools.utils import TZS
+            offset_hours = TZS.get(tz_name, 0)
+        offset_minutes = 60 * abs(offset_hours) + int(minutes or 0)
+        value -= datetime.timedelta(minutes=-offset_minutes if offset_hours < 0 else offset_minutes)
+    
+    return value.strftime('%Y%m%d')
+
+
+def iter_rows(file):
+    """Yield [date, description, amount] for each transaction, in the same
+    form as the ofxtools-based parser."""
+    for fields in iter_transactions(file):
+        if 'DTPOSTED' not in fields or 'TRNAMT' not in fields:
+            raise OFXStreamError("Transaction without DTPOSTED or TRNAMT")
+        
+        try:
+            amount = Decimal(fields['TRNAMT'].replace(',', '.'))
+        except InvalidOperation:
+            raise OFXStreamError(f"'{fields['TRNAMT']}' is not an OFX amount")
+        
+        memo = fields.get('MEMO')
+        description = memo[:30] if memo else ''
+        
+        yield [
+            to_utc_date(fields['DTPOSTED']),
+            " ".join(description.split()),
+            "{:.2f}".format(amount)
+        ]
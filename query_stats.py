@@ -0,0 +1,291 @@
+"""Opt-in statement timing for the database module.
+
+While recording is enabled, database connections are opened with
+InstrumentedConnection, whose cursors time every statement, including the
+time spent fetching its rows, and count the rows it returned or changed.
+Totals are kept per normalized statement (literals and parameter lists
+folded, so the same query with different values is one entry), and any
+run slower than the threshold is logged with its parameters and the
+stack that issued it.
+
+Set EXPENSE_TRACKER_QUERY_STATS to a file name to record from startup and
+write the report there at exit (or to 1 to only record, for the Query
+Diagnostics window), and EXPENSE_TRACKER_SLOW_MS to change the slow
+threshold."""
+import os
+import re
+import sqlite3
+import threading
+import time
+import traceback
+from collections import deque
+from functools import lru_cache
+
+DEFAULT_SLOW_MS = 50
+MAX_SLOW_QUERIES = 200
+STACK_DEPTH = 8
+
+STATS_VARIABLE = 'EXPENSE_TRACKER_QUERY_STATS'
+SLOW_MS_VARIABLE = 'EXPENSE_TRACKER_SLOW_MS'
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+PARAMETER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+OWN_FILE = os.path.abspath(__file__)
+
+
+@lru_cache(maxsize=2048)
+def normalize(sql):
+    """Statement text with literals replaced by ? and whitespace collapsed,
+    e.g. "SELECT * FROM t WHERE id IN (1, 2)" -> "SELECT * FROM t WHERE id IN (?, ...)"."""
+    text = STRING.sub('?', sql)
+    text = NUMBER.sub('?', text)
+    text = " ".join(text.split())
+    return PARAMETER_LIST.sub('(?, ...)', text)
+
+
+def caller_stack():
+    """The innermost STACK_DEPTH frames outside this module, innermost last,
+    as 'file:line in function'."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if os.path.abspath(frame.filename) != OWN_FILE
+    ]
+    return [
+        f"{os.path.basename(frame.filename)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-STACK_DEPTH:]
+    ]
+
+
+class StatementStats:
+    def __init__(self, sql):
+        self.sql = sql
+        self.calls = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.sample = None
+    
+    @property
+    def average_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class SlowQuery:
+    def __init__(self, sql, params, ms, rows, stack):
+        self.sql = sql
+        self.params = params
+        self.ms = ms
+        self.rows = rows
+        self.stack = stack
+        self.thread = threading.current_thread().name
+        self.time = time.time()
+
+
+class QueryStats:
+    """Totals per normalized statement and a log of the slowest runs,
+    shared by every instrumented connection."""
+    
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = DEFAULT_SLOW_MS
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def enable(self, slow_ms=None):
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        self.enabled = True
+    
+    def disable(self):
+        self.enabled = False
+    
+    def reset(self):
+        with self._lock:
+            self.statements = {}
+            self.slow = deque(maxlen=MAX_SLOW_QUERIES)
+            self.started = time.time()
+    
+    def record(self, sql, params, ms, rows):
+        if not self.enabled:
+            return
+        
+        key = normalize(sql)
+        stack = caller_stack() if ms >= self.slow_ms else None
+        with self._lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                entry = self.statements[key] = StatementStats(key)
+            entry.calls += 1
+            entry.rows += rows
+            entry.total_ms += ms
+            entry.max_ms = max(entry.max_ms, ms)
+            entry.sample = (sql, params)
+            
+            if stack is not None:
+                self.slow.append(SlowQuery(sql, params, ms, rows, stack))
+    
+    def snapshot(self):
+        """(statements by total time, slowest first; slow queries, newest
+        first)."""
+        with self._lock:
+            statements = sorted(self.statements.values(), key=lambda entry: entry.total_ms, reverse=True)
+            slow = list(reversed(self.slow))
+        return statements, slow
+
+
+stats = QueryStats()
+
+
+class Execution:
+    """One statement run on a cursor, until its rows have been read."""
+    
+    def __init__(self, sql, params, ms, rows):
+        self.sql = sql
+        self.params = params
+        self.ms = ms
+        self.rows = rows
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that records each statement in stats once its rows have been
+    fetched, the cursor is reused or closed, or it is dropped."""
+    
+    _execution = None
+    
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._execution = Execution(sql, parameters, (time.perf_counter() - start) * 1000, max(self.rowcount, 0))
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._execution = Execution(sql, None, (time.perf_counter() - start) * 1000, max(self.rowcount, 0))
+            self._finish()
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1, row is None)
+        return row
+    
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows), not rows)
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+    
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+    
+    def close(self):
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+    
+    def _fetched(self, start, rows, done):
+        execution = self._execution
+        if execution is not None:
+            execution.ms += (time.perf_counter() - start) * 1000
+            execution.rows += rows
+            if done:
+                self._finish()
+    
+    def _finish(self):
+        execution = self._execution
+        if execution is not None:
+            self._execution = None
+            stats.record(execution.sql, execution.params, execution.ms, execution.rows)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose statements, commits and rollbacks are recorded."""
+    
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def commit(self):
+        start = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            stats.record('COMMIT', None, (time.perf_counter() - start) * 1000, 0)
+    
+    def rollback(self):
+        start = time.perf_counter()
+        try:
+            super().rollback()
+        finally:
+            stats.record('ROLLBACK', None, (time.perf_counter() - start) * 1000, 0)
+
+
+def connection_factory():
+    return InstrumentedConnection if stats.enabled else sqlite3.Connection
+
+
+def format_report(explain=None):
+    """Plain-text report of the recorded statements and slow queries. With
+    explain(sql, params), each slow query's plan is included."""
+    statements, slow = stats.snapshot()
+    started = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.started))
+    lines = [
+        f"Query statistics since {started} (slow threshold {stats.slow_ms:g} ms)",
+        "",
+        f"{'Calls':>8} {'Rows':>10} {'Total ms':>10} {'Avg ms':>8} {'Max ms':>8}  Statement",
+    ]
+    for entry in statements:
+        lines.append(
+            f"{entry.calls:>8} {entry.rows:>10} {entry.total_ms:>10.1f} "
+            f"{entry.average_ms:>8.2f} {entry.max_ms:>8.1f}  {entry.sql}"
+        )
+    
+    lines += ["", f"Slow queries ({len(slow)}, newest first)"]
+    for query in slow:
+        lines += [
+            "",
+            f"{query.ms:.1f} ms, {query.rows} rows, {query.thread}, "
+            f"{time.strftime('%H:%M:%S', time.localtime(query.time))}",
+            f"    {' '.join(query.sql.split())}",
+        ]
+        if query.params:
+            lines.append(f"    params: {query.params!r}")
+        lines += [f"    at {frame}" for frame in reversed(query.stack)]
+        if explain is not None and query.params is not None:
+            try:
+                plan = explain(query.sql, query.params)
+            except sqlite3.Error as error:
+                plan = [f"(no plan: {error})"]
+            lines += [f"    plan: {line}" for line in plan]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,132 @@
+import re
+from collections import deque
+
+MATCH_TYPES = {
+    'exact': 'Exact',
+    'prefix': 'Starts With',
+    'contains': 'Contains',
+    'regex': 'Regex',
+}
+
+# When rules of equal priority match the same description, the more
+# specific match type wins, then the most recently created rule.
+SPECIFICITY = {'exact': 3, 'prefix': 2, 'contains': 1, 'regex': 0}
+
+
+def validate_pattern(match_type, pattern):
+    if match_type not in MATCH_TYPES:
+        raise ValueError(f"Unknown match type: {match_type}")
+    if not pattern:
+        raise ValueError("Rule pattern cannot be empty")
+    if match_type == 'regex':
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            raise ValueError(f"Invalid regular expression: {error}")
+
+
+class AhoCorasick:
+    """Finds every occurrence of a set of literal patterns in one pass over
+    the text, however many patterns there are."""
+
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for pattern, value in patterns:
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][ch] = nxt
+                node = nxt
+            self._out[node].append((len(pattern), value))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yield (start, value) for every pattern occurrence in text."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                yield i - length + 1, value
+
+
+class RuleMatcher:
+    """Compiled form of the categoryRules table.
+
+    Exact rules are a dict lookup on the whole description. Prefix and
+    contains rules are case-insensitive and share one Aho-Corasick
+    automaton, so a single scan of a description finds all of them. Regex
+    rules are searched case-insensitively, highest rank first."""
+
+    def __init__(self, rules):
+        self._exact = {}
+        literals = []
+        regexes = []
+
+        for rule in rules:
+            oid, applied_to, category = rule[0], rule[2], rule[3]
+            match_type = rule[4] if len(rule) > 4 else 'exact'
+            priority = rule[5] if len(rule) > 5 else 0
+
+            if not applied_to or match_type not in MATCH_TYPES:
+                continue
+
+            rank = (priority or 0, SPECIFICITY[match_type], oid)
+            candidate = (rank, category)
+
+            if match_type == 'exact':
+                if applied_to not in self._exact or self._exact[applied_to] < candidate:
+                    self._exact[applied_to] = candidate
+            elif match_type == 'regex':
+                try:
+                    regexes.append((re.compile(applied_to, re.IGNORECASE), candidate))
+                except re.error:
+                    continue
+            else:
+                literals.append((applied_to.casefold(), (match_type, candidate)))
+
+        self._literals = AhoCorasick(literals) if literals else None
+        self._regexes = sorted(regexes, key=lambda r: r[1], reverse=True)
+
+    def __bool__(self):
+        return bool(self._exact or self._literals or self._regexes)
+
+    def match(self, description):
+        """Category of the best rule matching description, or None."""
+        description = description or ''
+        best = self._exact.get(description)
+
+        if self._literals is not None:
+            for start, (match_type, candidate) in self._literals.iter_matches(description.casefold()):
+                if match_type == 'prefix' and start != 0:
+                    continue
+                if best is None or best < candidate:
+                    best = candidate
+
+        for pattern, candidate in self._regexes:
+            if best is not None and candidate < best:
+                break
+            if pattern.search(description):
+                best = candidate
+                break
+
+        return best[1] if best else None
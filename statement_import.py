@@ -0,0 +1,183 @@
+"""Statement import and the category rule engine, without Tk, so they can
+run in background jobs and from cli.py."""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import database as db
+from rule_matcher import RuleMatcher
+from statement_parsers import read_csv, read_ofx, parse_statement, statement_type
+
+
+BALANCE_DESCRIPTIONS = ('OPEN BALANCE', 'CLOSE BALANCE')
+
+
+_compiled_rules = {'rules': None, 'matcher': None}
+
+
+def get_rule_matcher():
+    rules = db.get_category_rules()
+    if _compiled_rules['rules'] != rules:
+        _compiled_rules['matcher'] = RuleMatcher(rules)
+        _compiled_rules['rules'] = rules
+    return _compiled_rules['matcher']
+
+
+def auto_apply_rules(account_name):
+    if db.account_needs_rules(account_name):
+        matcher = get_rule_matcher()
+        db.apply_category_rules(account_name, matcher.match if matcher else None)
+
+
+def import_transactions(account_name, new_trans, skip_descriptions=(), on_chunk=None):
+    filtered = [0]
+    
+    def rows():
+        for trans in new_trans:
+            if trans[1] in skip_descriptions or trans[2] is None:
+                filtered[0] += 1
+            else:
+                yield trans
+    
+    added_count, skipped_count = db.add_transactions(account_name, rows(), on_chunk=on_chunk)
+    return added_count, skipped_count + filtered[0]
+
+
+def get_csv_columns():
+    options = db.get_options()
+    if not options:
+        raise Exception("Please configure CSV column settings first")
+    
+    opt = options[0]
+    return opt[1], opt[3], opt[2]
+
+
+def import_statement_file(account_name, file, csv_columns=None, job=None):
+    """Parse a statement, store its new transactions and apply the category
+    rules. CSV files need csv_columns as (date, description, amount) column
+    indexes; without them the file is read as OFX. Returns (added, skipped).
+    
+    Does not touch Tk, so it can run as a background job. Cancelling undoes
+    the whole import."""
+    if job:
+        job.progress(0, None, 'Reading statement...')
+    
+    if csv_columns is not None:
+        new_trans = read_csv(file, *csv_columns)
+        skip_descriptions = BALANCE_DESCRIPTIONS
+    else:
+        new_trans = read_ofx(file)
+        skip_descriptions = ()
+    
+    def saved(count):
+        if job:
+            job.check()
+            job.progress(0, None, f'Read {count} transactions...')
+    
+    with db.transaction():
+        added_count, skipped_count = import_transactions(account_name, new_trans, skip_descriptions, saved)
+        
+        if job:
+            job.check()
+            job.progress(1, 2, 'Applying category rules...')
+        auto_apply_rules(account_name)
+        
+        if job:
+            job.check()
+    
+    return added_count, skipped_count
+
+
+def parse_statements(files, csv_columns=None, job=None, kind=None):
+    """Parse files in worker processes, as kind or by extension. Returns a
+    list with the rows of each file, or the exception raised while reading
+    it."""
+    parsed = [None] * len(files)
+    if len(files) == 1:
+        try:
+            parsed[0] = parse_statement(files[0], csv_columns, kind)
+        except Exception as error:
+            parsed[0] = error
+        return parsed
+    
+    workers = min(len(files), os.cpu_count() or 1)
+    # Worker processes are spawned rather than forked so they never inherit
+    # Tk or the database connections.
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {pool.submit(parse_statement, file, csv_columns, kind): i for i, file in enumerate(files)}
+        try:
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    parsed[futures[future]] = future.result()
+                except Exception as error:
+                    parsed[futures[future]] = error
+                if job:
+                    job.check()
+                    job.progress(done, len(files), f'Read {done} of {len(files)} statements...')
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+    return parsed
+
+
+def describe_import_error(error):
+    if isinstance(error, IndexError):
+        return 'Check the CSV columns selected in Settings'
+    if isinstance(error, FileNotFoundError):
+        return 'File not found'
+    return str(error) or type(error).__name__
+
+
+def guess_account(file, accounts):
+    """The longest account name that appears in the file's name or its
+    folder's name (ignoring case), or None."""
+    folder, name = os.path.split(file)
+    haystack = f"{os.path.basename(folder)}/{name}".casefold()
+    matches = [account for account in accounts if account.casefold() in haystack]
+    return max(matches, key=len) if matches else None
+
+
+def import_statement_files(statements, csv_columns=None, job=None, kind=None):
+    """Import many statements at once. statements is a list of
+    (file, account_name); each is read as kind ('csv' or 'ofx'), or as
+    chosen by its extension when kind is None.
+    
+    Files are parsed in parallel, then every file is inserted, deduplicated
+    against what is already stored, inside one transaction, and the rules
+    are applied once per account. A file that fails is reported and
+    skipped. Returns (file, account_name, added, skipped, error) for each
+    statement, with error None on success."""
+    files = [file for file, account_name in statements]
+    if job:
+        job.progress(0, len(files), f'Reading {len(files)} statements...')
+    parsed = parse_statements(files, csv_columns, job, kind)
+    
+    summary = []
+    imported_accounts = []
+    with db.transaction():
+        for (file, account_name), rows in zip(statements, parsed):
+            if isinstance(rows, Exception):
+                summary.append((file, account_name, 0, 0, describe_import_error(rows)))
+                continue
+            
+            skip_descriptions = BALANCE_DESCRIPTIONS if (kind or statement_type(file)) == 'csv' else ()
+            try:
+                with db.transaction():
+                    added_count, skipped_count = import_transactions(account_name, rows, skip_descriptions)
+            except Exception as error:
+                summary.append((file, account_name, 0, 0, describe_import_error(error)))
+                continue
+            
+            summary.append((file, account_name, added_count, skipped_count, None))
+            if account_name not in imported_accounts:
+                imported_accounts.append(account_name)
+            if job:
+                job.check()
+                job.progress(len(summary), len(statements), f'Saved {len(summary)} of {len(statements)} statements...')
+        
+        for account_name in imported_accounts:
+            if job:
+                job.check()
+                job.progress(0, None, f'Applying category rules to {account_name}...')
+            auto_apply_rules(account_name)
+    
+    return summary
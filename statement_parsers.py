@@ -0,0 +1,125 @@
+import codecs
+import csv
+import math
+import os
+from ofx_stream import CHUNK_SIZE, OFXStreamError, iter_rows
+
+
+STATEMENT_TYPES = {'.csv': 'csv', '.ofx': 'ofx', '.qfx': 'ofx'}
+
+
+def csv_codec(file):
+    """'utf-8-sig' when the whole file is valid UTF-8, otherwise 'cp1252',
+    which is what banks' Windows exports use."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    with open(file, 'rb') as handle:
+        try:
+            while True:
+                chunk = handle.read(CHUNK_SIZE)
+                decoder.decode(chunk, final=not chunk)
+                if not chunk:
+                    return 'utf-8-sig'
+        except UnicodeDecodeError:
+            return 'cp1252'
+
+
+def csv_amount(value):
+    """The amount as a string with two decimals, or None when the cell is
+    blank or not a number."""
+    try:
+        amount = float(value)
+    except ValueError:
+        return None
+    return "{:.2f}".format(amount) if math.isfinite(amount) else None
+
+
+def read_csv(file, date_col, desc_col, amount_col):
+    """Yield [date, description, amount] for each row of a CSV statement,
+    reading the file line by line. The first line is a header. The amount is
+    None for rows without a usable one, including rows too short to have
+    the amount column, which the import skips."""
+    with open(file, newline='', encoding=csv_codec(file), errors='replace') as handle:
+        reader = csv.reader(handle)
+        next(reader, None)
+        width = max(date_col, desc_col, amount_col) + 1
+        
+        for row in reader:
+            if not row:
+                continue
+            if len(row) < width:
+                # A short line, e.g. an "End of statement" footer, has no
+                # amount, so the import skips it.
+                row = row + [''] * (width - len(row))
+            yield [
+                row[date_col].strip(),
+                " ".join(row[desc_col].split()),
+                csv_amount(row[amount_col])
+            ]
+
+
+def parse_ofx(file):
+    from ofxtools.Parser import OFXTree
+    
+    ofx = OFXTree()
+    ofx.parse(file)
+    ofx_obj = ofx.convert()
+    
+    statement = ofx_obj.statements
+    transactions = statement[0].transactions
+    
+    new_trans = []
+    for trans in transactions:
+        date = trans.dtposted.strftime("%Y-%m-%d").replace('-', '')
+        description = trans.memo[:30] if trans.memo else ''
+        amount = trans.trnamt
+        
+        new_trans.append([
+            str(date),
+            " ".join(str(description).split()),
+            str("{:.2f}".format(amount))
+        ])
+    return new_trans
+
+
+def read_ofx(file):
+    """Yield rows from an OFX/QFX statement without loading it into memory,
+    covering every statement in the file. Falls back to parse_ofx (ofxtools,
+    first statement only) when the streaming reader cannot make sense of
+    the file before its first transaction."""
+    rows = iter_rows(file)
+    try:
+        first = next(rows, None)
+    except OFXStreamError:
+        yield from parse_ofx(file)
+        return
+    
+    if first is not None:
+        yield first
+        yield from rows
+
+
+def statement_type(file):
+    """'csv' or 'ofx' from the file extension, or None for other files."""
+    return STATEMENT_TYPES.get(os.path.splitext(file)[1].lower())
+
+
+def find_statements(folder):
+    """Every CSV/OFX/QFX file under folder, sorted by path."""
+    found = []
+    for root, dirs, files in os.walk(folder):
+        for name in files:
+            if statement_type(name):
+                found.append(os.path.join(root, name))
+    return sorted(found)
+
+
+def parse_statement(file, csv_columns=None, kind=None):
+    """Rows of a statement file as [date, description, amount] lists, read
+    as kind ('csv' or 'ofx') or according to its extension. Only uses the
+    standard library and ofxtools, so it is cheap to run in a worker
+    process."""
+    if (kind or statement_type(file)) == 'csv':
+        if csv_columns is None:
+            raise Exception("Please configure CSV column settings first")
+        return list(read_csv(file, *csv_columns))
+    return list(read_ofx(file))
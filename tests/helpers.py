@@ -0,0 +1,29 @@
+import os
+import shutil
+import tempfile
+import unittest
+import database as db
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test against a new database in a temporary folder."""
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.folder, 'database.db')
+        db.configure(database_file=self.database_file)
+        db.init_database()
+    
+    def tearDown(self):
+        db.close_connections()
+        db.read_cache.clear()
+        shutil.rmtree(self.folder, ignore_errors=True)
+    
+    def new_database(self, name):
+        """Switch to another empty database in the same folder."""
+        db.configure(database_file=os.path.join(self.folder, name))
+        db.init_database()
+    
+    def rows(self, account_name):
+        """(id, description, category) of every stored row, by id."""
+        return [(row[0], row[2], row[4]) for row in db.get_bank_statement_data(account_name)]
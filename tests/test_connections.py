@@ -0,0 +1,46 @@
+import threading
+import time
+import database as db
+from tests.helpers import DatabaseTestCase
+
+
+class CloseDuringTransactionTest(DatabaseTestCase):
+    """Closing or reconfiguring the connections while another thread is
+    inside a transaction waits for that transaction instead of hanging."""
+    
+    def run_while_in_transaction(self, close):
+        started = threading.Event()
+        go = threading.Event()
+        errors = []
+        
+        def work():
+            try:
+                with db.transaction():
+                    started.set()
+                    go.wait(10)
+                    db.add_category('groceries')
+                    db.get_categories()
+            except Exception as error:
+                errors.append(error)
+        
+        worker = threading.Thread(target=work, daemon=True)
+        worker.start()
+        self.assertTrue(started.wait(10))
+        
+        closer = threading.Thread(target=close, daemon=True)
+        closer.start()
+        # Let close() get as far as waiting for the transaction.
+        time.sleep(0.2)
+        go.set()
+        
+        worker.join(10)
+        closer.join(10)
+        self.assertFalse(worker.is_alive() or closer.is_alive(), "deadlocked")
+        self.assertEqual(errors, [])
+        self.assertIn('Groceries', db.get_categories())
+    
+    def test_close_connections(self):
+        self.run_while_in_transaction(db.close_connections)
+    
+    def test_configure(self):
+        self.run_while_in_transaction(lambda: db.configure(database_file=self.database_file))
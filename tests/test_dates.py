@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+import database as db
+from dates import DateParser, parse_date, to_date_int
+from tests.helpers import DatabaseTestCase
+
+
+def day_first_statement(days):
+    """(date, description, amount) rows for 1 to days March 2024, written
+    day-first, with every day up to 12 first."""
+    return [(f"{day:02d}/03/2024", f"Shop {day}", "-1.00") for day in range(1, days + 1)]
+
+
+class ParseDateTest(unittest.TestCase):
+    def test_eight_digits_must_be_a_date(self):
+        self.assertEqual(parse_date('20240301'), 20240301)
+        self.assertIsNone(parse_date('20241340'))
+        self.assertIsNone(parse_date('01032024'))
+        self.assertEqual(to_date_int('20241340'), '20241340')
+
+
+class DateParserTest(unittest.TestCase):
+    def test_every_sample_counts(self):
+        dates = [f"{day:02d}/03/2024" for day in (1, 5) * 40] + ['13/03/2024']
+        parse_date = DateParser(dates)
+        self.assertEqual(parse_date.date_format, '%d/%m/%Y')
+        self.assertEqual([parse_date(text) for text in ('01/03/2024', '05/03/2024', '13/03/2024')], [20240301, 20240305, 20240313])
+    
+    def test_later_dates_change_the_format(self):
+        parse_date = DateParser(['01/03/2024', '05/03/2024'])
+        self.assertEqual(parse_date('01/03/2024'), 20240103)
+        self.assertTrue(parse_date.learn(['13/03/2024']))
+        self.assertEqual(parse_date('01/03/2024'), 20240301)
+        self.assertFalse(parse_date.learn(['02/03/2024', '13/03/2024']))
+    
+    def test_day_first_digits(self):
+        parse_date = DateParser(['01032024', '15032024'])
+        self.assertEqual(parse_date.date_format, '%d%m%Y')
+        self.assertEqual([parse_date(text) for text in ('01032024', '15032024')], [20240301, 20240315])
+        self.assertEqual(DateParser(['20240301', '20241231']).date_format, '%Y%m%d')
+    
+    def test_other_dates_keep_the_statement_order(self):
+        parse_date = DateParser(['13/03/2024'])
+        self.assertEqual(parse_date('01/03/24'), 20240301)
+        self.assertEqual(parse_date('Pending'), 'Pending')
+        self.assertEqual(parse_date(20240301), 20240301)
+
+
+class ImportDatesTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.add_bank_account('cheque')
+    
+    def stored_dates(self):
+        return [row[1] for row in db.get_bank_statement_data('cheque')]
+    
+    def test_day_first_after_the_first_chunk(self):
+        with mock.patch.object(db, 'IMPORT_CHUNK_SIZE', 5):
+            self.assertEqual(db.add_transactions('cheque', day_first_statement(20)), (20, 0))
+            self.assertEqual(db.add_transactions('cheque', day_first_statement(20)), (0, 20))
+        self.assertEqual(sorted(self.stored_dates()), [20240300 + day for day in range(1, 21)])
+    
+    def test_day_first_digits(self):
+        rows = [(f"{day:02d}032024", f"Shop {day}", "-1.00") for day in range(1, 21)]
+        with mock.patch.object(db, 'IMPORT_CHUNK_SIZE', 5):
+            self.assertEqual(db.add_transactions('cheque', rows), (20, 0))
+        self.assertEqual(sorted(self.stored_dates()), [20240300 + day for day in range(1, 21)])
+    
+    def test_same_fingerprints_as_one_chunk(self):
+        with mock.patch.object(db, 'IMPORT_CHUNK_SIZE', 4):
+            db.add_transactions('cheque', day_first_statement(14))
+        self.assertEqual(db.add_transactions('cheque', day_first_statement(14)), (0, 14))
@@ -0,0 +1,86 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import database as db
+
+
+def create_baseline_database(path, accounts):
+    """A database as the release before versioned migrations left it.
+    accounts maps each bankAccountNames row, in order, to the
+    (date, description, amount, category) rows of its table; that release
+    accepted the same name twice and SQLite table names ignore case, so
+    rows can share a table."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE bankStatement (date TEXT, description TEXT, amount TEXT, category TEXT)")
+    conn.execute("CREATE TABLE options (id INTEGER, date INTEGER, amount INTEGER, description INTEGER)")
+    conn.execute("INSERT INTO options VALUES (0, 0, 0, 0)")
+    conn.execute("CREATE TABLE category (category TEXT, budget TEXT)")
+    for category in ('Income', 'Entertainment Expense', 'Rates and Taxes', 'Fuel', 'Delete'):
+        conn.execute("INSERT INTO category VALUES (?, 'None')", (category,))
+    conn.execute("CREATE TABLE categoryRules (ruleName TEXT, appliedTo TEXT, category TEXT)")
+    conn.execute("CREATE TABLE ofxCsv (id INTEGER, selected INTEGER)")
+    conn.execute("INSERT INTO ofxCsv VALUES (0, 0)")
+    conn.execute("CREATE TABLE bankAccountNames (account TEXT)")
+    
+    for account_name, rows in accounts:
+        conn.execute("INSERT INTO bankAccountNames VALUES (?)", (account_name,))
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {account_name} (date TEXT, description TEXT, amount TEXT, category TEXT)")
+        conn.executemany(f"INSERT INTO {account_name} VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+class BaselineMigrationTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.database_file = os.path.join(self.folder, 'database.db')
+    
+    def tearDown(self):
+        db.close_connections()
+        db.read_cache.clear()
+        shutil.rmtree(self.folder, ignore_errors=True)
+    
+    def migrate(self):
+        db.configure(database_file=self.database_file)
+        db.init_database()
+    
+    def test_duplicate_account_rows(self):
+        create_baseline_database(self.database_file, [
+            ('savings', [('2024-02-01', 'COFFEE', '-12.50', 'Please Select'), ('2024-02-02', 'PAY', '100', 'Income')]),
+            ('savings', []),
+            ('Savings', []),
+            ('cheque', [('2024-03-01', 'RENT', '-400.00', 'Please Select')]),
+        ])
+        self.migrate()
+        
+        self.assertEqual(
+            [row[1:] for row in db.get_bank_statement_data('savings')],
+            [(20240201, 'COFFEE', -1250, 'Please Select'), (20240202, 'PAY', 10000, 'Income')]
+        )
+        self.assertEqual([row[3] for row in db.get_bank_statement_data('cheque')], [-40000])
+        self.assertEqual(db.get_bank_statement_data('Savings'), [])
+        self.assertEqual(db.check_category_totals(), [])
+        summary = {name: total for name, total, budget in db.get_category_summary()}
+        self.assertEqual(summary['Uncategorized'], 412.5)
+        self.assertEqual(summary['Income'], 100.0)
+        
+        # Fingerprints survived, so importing the same rows again adds nothing.
+        self.assertEqual(db.add_transactions('savings', [('2024-02-01', 'COFFEE', '-12.50')]), (0, 1))
+    
+    def test_typed_table_is_not_converted_again(self):
+        create_baseline_database(self.database_file, [('savings', [('2024-02-01', 'COFFEE', '-12.50', 'Please Select')])])
+        conn = sqlite3.connect(self.database_file)
+        conn.execute("CREATE TABLE schemaVersion (version INTEGER)")
+        conn.execute("INSERT INTO schemaVersion VALUES (0)")
+        conn.commit()
+        conn.close()
+        
+        db.configure(database_file=self.database_file)
+        with db.transaction() as conn:
+            db.migration_1_upgrade_tables(conn)
+            db.migration_2_typed_columns(conn)
+            db.migration_2_typed_columns(conn)
+            self.assertEqual(conn.execute("SELECT amount FROM savings").fetchall(), [(-1250,)])
@@ -0,0 +1,161 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import ofx_stream
+from statement_parsers import parse_ofx, read_ofx
+
+SGML_HEADER = (
+    "OFXHEADER:100\r\nDATA:OFXSGML\r\nVERSION:102\r\nSECURITY:NONE\r\nENCODING:USASCII\r\n"
+    "CHARSET:1252\r\nCOMPRESSION:NONE\r\nOLDFILEUID:NONE\r\nNEWFILEUID:NONE\r\n\r\n"
+)
+XML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+    '<?OFX OFXHEADER="200" VERSION="220" SECURITY="NONE" OLDFILEUID="NONE" NEWFILEUID="NONE"?>\n'
+)
+TIME_ZONES = ('', '[-5:EST]', '[+10:AEST]', '[0:GMT]', '[-3.30:NST]', '[5.45]')
+MEMOS = (
+    'POS  PURCHASE &amp; more', 'Salary', 'A very long memo text that exceeds thirty characters',
+    'Caf\xe9 d&lt;x&gt;', '',
+)
+AMOUNTS = ('-10.5', '3', '1234.56', '-0.01', '7,25')
+
+
+class StatementWriter:
+    """Random OFX statements as SGML (elements left open) or XML."""
+    
+    def __init__(self, seed, xml):
+        self.random = random.Random(seed)
+        self.xml = xml
+    
+    def element(self, tag, value):
+        return f"<{tag}>{value}" + (f"</{tag}>" if self.xml else "")
+    
+    def transaction(self, fitid):
+        e = self.element
+        choice = self.random.choice
+        posted = f"2023{self.random.randint(1, 12):02d}{self.random.randint(1, 28):02d}" + choice((
+            '',
+            '120000',
+            f"{self.random.randint(0, 23):02d}{self.random.randint(0, 59):02d}"
+            f"{self.random.randint(0, 59):02d}.000{choice(TIME_ZONES)}",
+        ))
+        text = f"<STMTTRN>{e('TRNTYPE', 'DEBIT')}{e('DTPOSTED', posted)}{e('TRNAMT', choice(AMOUNTS))}{e('FITID', fitid)}"
+        # NAME inside the nested aggregates must not be taken for the
+        # transaction's own.
+        if self.random.random() < 0.5:
+            text += e('NAME', f"Top name {fitid}")
+        else:
+            text += (f"<PAYEE>{e('NAME', f'Payee {fitid}')}{e('ADDR1', 'x')}{e('CITY', 'c')}{e('STATE', 's')}"
+                     f"{e('POSTALCODE', '1')}{e('PHONE', '1')}</PAYEE>")
+        if self.random.random() < 0.3:
+            text += f"<BANKACCTTO>{e('BANKID', '2')}{e('ACCTID', fitid)}{e('ACCTTYPE', 'SAVINGS')}</BANKACCTTO>"
+        memo = choice(MEMOS)
+        if memo:
+            text += "\n" + e('MEMO', memo + "  ")
+        return text + "\n</STMTTRN>\n"
+    
+    def statement(self, credit_card, count, start):
+        e = self.element
+        transactions = "".join(self.transaction(start + i) for i in range(count))
+        status = f"<STATUS>{e('CODE', 0)}{e('SEVERITY', 'INFO')}</STATUS>"
+        transaction_list = f"<BANKTRANLIST>{e('DTSTART', 20230101)}{e('DTEND', 20231231)}{transactions}</BANKTRANLIST>"
+        balance = f"<LEDGERBAL>{e('BALAMT', 1)}{e('DTASOF', 20231231)}</LEDGERBAL>"
+        if credit_card:
+            return (f"<CCSTMTTRNRS>{e('TRNUID', 1)}{status}<CCSTMTRS>{e('CURDEF', 'USD')}"
+                    f"<CCACCTFROM>{e('ACCTID', start)}</CCACCTFROM>{transaction_list}{balance}</CCSTMTRS></CCSTMTTRNRS>")
+        return (f"<STMTTRNRS>{e('TRNUID', 1)}{status}<STMTRS>{e('CURDEF', 'USD')}"
+                f"<BANKACCTFROM>{e('BANKID', 1)}{e('ACCTID', start)}{e('ACCTTYPE', 'CHECKING')}</BANKACCTFROM>"
+                f"{transaction_list}{balance}</STMTRS></STMTTRNRS>")
+    
+    def write(self, path, count, several):
+        e = self.element
+        signon = (f"<SIGNONMSGSRSV1><SONRS><STATUS>{e('CODE', 0)}{e('SEVERITY', 'INFO')}</STATUS>"
+                  f"{e('DTSERVER', 20231231)}{e('LANGUAGE', 'ENG')}</SONRS></SIGNONMSGSRSV1>")
+        bank = self.statement(False, count, 0)
+        credit_card = ""
+        if several:
+            bank += self.statement(False, count // 2, 10 ** 6)
+            credit_card = f"<CREDITCARDMSGSRSV1>{self.statement(True, count // 3, 2 * 10 ** 6)}</CREDITCARDMSGSRSV1>"
+        body = f"{XML_HEADER if self.xml else SGML_HEADER}<OFX>{signon}<BANKMSGSRSV1>{bank}</BANKMSGSRSV1>{credit_card}</OFX>\n"
+        with open(path, 'w', encoding='utf-8' if self.xml else 'cp1252') as handle:
+            handle.write(body)
+
+
+def ofxtools_statements(path):
+    """Rows of every statement in the file, read with ofxtools the way
+    parse_ofx reads the first."""
+    from ofxtools.Parser import OFXTree
+    
+    tree = OFXTree()
+    tree.parse(path)
+    statements = []
+    for statement in tree.convert().statements:
+        rows = []
+        for trans in statement.transactions:
+            description = trans.memo[:30] if trans.memo else ''
+            rows.append([trans.dtposted.strftime("%Y%m%d"), " ".join(str(description).split()), "{:.2f}".format(trans.trnamt)])
+        statements.append(rows)
+    return statements
+
+
+class ReadOfxTest(unittest.TestCase):
+    """read_ofx streams the same rows ofxtools gives, across every
+    statement in the file."""
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+    
+    def write(self, xml, several, count=300, seed=19):
+        path = os.path.join(self.folder, f"statement_{xml}_{several}.ofx")
+        StatementWriter(seed, xml).write(path, count, several)
+        return path
+    
+    def test_matches_ofxtools(self):
+        for xml in (False, True):
+            for several in (False, True):
+                with self.subTest(xml=xml, several=several):
+                    path = self.write(xml, several)
+                    statements = ofxtools_statements(path)
+                    self.assertEqual(len(statements), 3 if several else 1)
+                    self.assertEqual(parse_ofx(path), statements[0])
+                    self.assertEqual(list(read_ofx(path)), [row for rows in statements for row in rows])
+    
+    def test_tags_split_between_chunks(self):
+        for xml in (False, True):
+            path = self.write(xml, True, count=60)
+            expected = [row for rows in ofxtools_statements(path) for row in rows]
+            for chunk_size in (1, 7, 17, 64, 251):
+                with self.subTest(xml=xml, chunk_size=chunk_size):
+                    with mock.patch.object(ofx_stream, 'CHUNK_SIZE', chunk_size):
+                        self.assertEqual(list(read_ofx(path)), expected)
+    
+    def test_time_zones(self):
+        cases = {
+            '20230301': '20230301',
+            '20230301120000': '20230301',
+            '20230301230000.000[-5:EST]': '20230302',
+            '20230301080000.000[+10:AEST]': '20230228',
+            '20230301220000.000[-3.30:NST]': '20230302',
+            '20230301030000.000[5.45]': '20230228',
+            '20230301235959.000[0:GMT]': '20230301',
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(ofx_stream.to_utc_date(text), expected)
+        with self.assertRaises(ofx_stream.OFXStreamError):
+            ofx_stream.to_utc_date('March 1st')
+    
+    def test_falls_back_to_ofxtools(self):
+        path = self.write(False, False, count=20)
+        expected = parse_ofx(path)
+        # <OFX> beyond the header the streaming reader looks at.
+        with mock.patch.object(ofx_stream, 'HEADER_SIZE', 16):
+            with self.assertRaises(ofx_stream.OFXStreamError):
+                list(ofx_stream.iter_rows(path))
+            self.assertEqual(list(read_ofx(path)), expected)
@@ -0,0 +1,73 @@
+import random
+import database as db
+from tests.helpers import DatabaseTestCase
+
+CATEGORIES = ('Please Select', 'Fuel', 'Income', 'Rates and Taxes')
+DESCRIPTIONS = ('POS COFFEE', 'POS FUEL', 'SALARY', 'DEBIT ORDER', 'ATM')
+FILTERS = (
+    {},
+    {'category': 'Please Select'},
+    {'date_from': '2024-03-05', 'date_to': '2024-03-20'},
+    {'amount_min': '-50', 'amount_max': '-10'},
+    {'text': 'pos'},
+    {'text': 'fuel', 'amount_max': '0'},
+)
+
+
+class KeysetPaginationTest(DatabaseTestCase):
+    """Walking pages with transaction_key gives the same rows as one query
+    and as OFFSET pages, for every order, direction and filter."""
+    
+    def setUp(self):
+        super().setUp()
+        db.add_bank_account('cheque')
+        generator = random.Random(21)
+        # Few distinct values, so every order has long runs of ties.
+        rows = [
+            (f"202403{generator.randint(1, 28):02d}", f"{generator.choice(DESCRIPTIONS)} {generator.randint(1, 3)}",
+             f"{generator.choice((-90, -45, -45, -12.5, -3, 100)):.2f}")
+            for _ in range(400)
+        ]
+        db.add_transactions('cheque', rows)
+        for transaction_id, *_ in db.get_bank_statement_data('cheque'):
+            category = generator.choice(CATEGORIES)
+            if category != 'Please Select':
+                db.execute_query("UPDATE transactions SET category = ? WHERE id = ?", (category, transaction_id))
+    
+    def walk(self, filters, order_by, descending, page_size, count):
+        rows = []
+        key = None
+        while True:
+            page = db.query_transactions('cheque', filters, order_by, descending, after=key, limit=page_size)
+            if not page:
+                return rows
+            rows += page
+            self.assertLessEqual(len(rows), count, "keyset pages repeat rows")
+            key = db.transaction_key(page[-1], order_by)
+    
+    def test_keyset_matches_offset(self):
+        for filters in FILTERS:
+            count = db.count_transactions('cheque', filters)
+            for order_by in db.TRANSACTION_ORDERS:
+                for descending in (False, True):
+                    with self.subTest(filters=filters, order_by=order_by, descending=descending):
+                        expected = db.query_transactions('cheque', filters, order_by, descending, limit=10 ** 6)
+                        self.assertEqual(len(expected), count)
+                        keys = [db.transaction_key(row, order_by) for row in expected]
+                        self.assertEqual(keys, sorted(keys, reverse=descending))
+                        
+                        self.assertEqual(self.walk(filters, order_by, descending, 37, count), expected)
+                        offset_pages = []
+                        for offset in range(0, count, 37):
+                            offset_pages += db.query_transactions('cheque', filters, order_by, descending, limit=37, offset=offset)
+                        self.assertEqual(offset_pages, expected)
+    
+    def test_bad_arguments(self):
+        for filters in ({'date_from': 'abc'}, {'amount_min': 'x'}, {'nope': 1}):
+            with self.subTest(filters=filters):
+                with self.assertRaises(ValueError):
+                    db.count_transactions('cheque', filters)
+                with self.assertRaises(ValueError):
+                    db.query_transactions('cheque', filters)
+        with self.assertRaises(ValueError):
+            db.query_transactions('cheque', order_by='rowid')
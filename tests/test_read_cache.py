@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+from unittest import mock
+import database as db
+from tests.helpers import DatabaseTestCase
+
+
+class HelperThread:
+    """Runs functions on one long-lived thread, whose reader connection is
+    opened before the test starts a transaction."""
+    
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+        self.run(lambda: db.execute_query("SELECT 1", fetchone=True))
+    
+    def serve(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            self.results.put(job())
+    
+    def run(self, job):
+        self.jobs.put(job)
+        return self.results.get(timeout=10)
+    
+    def stop(self):
+        self.jobs.put(None)
+        self.thread.join()
+
+
+class ReadCacheTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.helper = HelperThread()
+    
+    def tearDown(self):
+        self.helper.stop()
+        super().tearDown()
+    
+    def reads(self):
+        return (db.get_categories(), db.get_options(), db.get_ofx_csv_setting(), db.get_category_rules(),
+                db.get_bank_accounts(), db.get_account_ids(), db.get_all_categories_with_budget())
+    
+    def test_repeated_reads_do_not_query(self):
+        self.reads()
+        with mock.patch.object(db, 'execute_query', wraps=db.execute_query) as execute_query:
+            for _ in range(100):
+                self.reads()
+        self.assertEqual(execute_query.call_count, 0)
+    
+    def test_account_ids_are_read_only(self):
+        db.add_bank_account('cheque')
+        with self.assertRaises(TypeError):
+            db.get_account_ids()['cheque'] = 99
+        self.assertEqual(dict(db.get_account_ids()), {'cheque': db.get_account_id('cheque')})
+    
+    def test_writes_invalidate(self):
+        self.reads()
+        db.add_category('groceries')
+        self.assertIn('Groceries', db.get_categories())
+        oid = db.execute_query("SELECT oid FROM category WHERE category = 'Groceries'", fetchone=True)[0]
+        db.update_category('food', '100', oid)
+        self.assertIn('Food', db.get_categories())
+        self.assertNotIn('Groceries', db.get_categories())
+        self.assertIn(('Food', '100'), db.get_all_categories_with_budget())
+        db.delete_category(oid)
+        self.assertNotIn('Food', db.get_categories())
+        
+        db.update_options(1, 2, 3)
+        self.assertEqual(db.get_options()[0][1:], (1, 2, 3))
+        db.update_ofx_csv_setting(1)
+        self.assertEqual(db.get_ofx_csv_setting(), 1)
+        
+        db.add_bank_account('cheque')
+        self.assertIn(('cheque',), db.get_bank_accounts())
+        self.assertIn('cheque', db.get_account_ids())
+        db.delete_bank_account('cheque')
+        self.assertNotIn(('cheque',), db.get_bank_accounts())
+        with self.assertRaises(ValueError):
+            db.get_account_id('cheque')
+        
+        db.add_category_rule('wool', 'WOOL', 'Fuel')
+        oid = db.get_category_rules()[0][0]
+        db.update_category_rule('wool', 'WOOLIES', 'Fuel', oid)
+        self.assertEqual(db.get_category_rules()[0][2], 'WOOLIES')
+        db.delete_category_rule(oid)
+        self.assertEqual(db.get_category_rules(), ())
+    
+    def test_transactions(self):
+        db.add_category_rule('one', 'ONE', 'Fuel')
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                db.add_category_rule('two', 'TWO', 'Fuel')
+                self.assertEqual(len(db.get_category_rules()), 2)
+                # Another thread sees, and may cache, the committed rules.
+                self.assertEqual(self.helper.run(lambda: len(db.get_category_rules())), 1)
+                self.assertEqual(len(db.get_category_rules()), 2)
+                raise RuntimeError
+        self.assertEqual(len(db.get_category_rules()), 1)
+        
+        with db.transaction():
+            db.add_category_rule('three', 'THREE', 'Fuel')
+            self.assertEqual(self.helper.run(lambda: len(db.get_category_rules())), 1)
+        self.assertEqual(len(db.get_category_rules()), 2)
+        self.assertEqual(self.helper.run(lambda: len(db.get_category_rules())), 2)
+    
+    def test_configure_clears(self):
+        db.add_bank_account('cheque')
+        db.add_category_rule('one', 'ONE', 'Fuel')
+        self.reads()
+        self.new_database('other.db')
+        self.assertEqual(db.get_bank_accounts(), ())
+        self.assertEqual(db.get_category_rules(), ())
+        self.assertTrue(os.path.exists(os.path.join(self.folder, 'other.db')))
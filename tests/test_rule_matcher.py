@@ -0,0 +1,83 @@
+import random
+import re
+import unittest
+from rule_matcher import MATCH_TYPES, SPECIFICITY, RuleMatcher
+
+# A small alphabet, with case and a character whose casefold is longer,
+# so patterns overlap and match often.
+ALPHABET = 'aAbB\xdfs '
+REGEXES = ('a+b', '^b', 'ss$', 'A.B', '[', '(a', 'b{2}', '')
+
+
+def brute_force(rules, description):
+    """Category of the best rule matching description, trying every rule."""
+    description = description or ''
+    best = None
+    for oid, _, pattern, category, match_type, priority in rules:
+        if not pattern or match_type not in MATCH_TYPES:
+            continue
+        if match_type == 'exact':
+            matched = description == pattern
+        elif match_type == 'prefix':
+            matched = description.casefold().startswith(pattern.casefold())
+        elif match_type == 'contains':
+            matched = pattern.casefold() in description.casefold()
+        else:
+            try:
+                matched = re.search(pattern, description, re.IGNORECASE) is not None
+            except re.error:
+                continue
+        rank = (priority or 0, SPECIFICITY[match_type], oid)
+        if matched and (best is None or best[0] < rank):
+            best = (rank, category)
+    return best[1] if best else None
+
+
+class RuleMatcherTest(unittest.TestCase):
+    """RuleMatcher.match against a loop over every rule."""
+    
+    def text(self, rng, longest):
+        return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, longest)))
+    
+    def test_matches_brute_force(self):
+        for seed in range(200):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                rules = []
+                for oid in rng.sample(range(1, 100), rng.randint(0, 12)):
+                    match_type = rng.choice(tuple(MATCH_TYPES) + ('fuzzy',))
+                    pattern = rng.choice(REGEXES) if match_type == 'regex' else self.text(rng, 3)
+                    rules.append((oid, 'rule', pattern, f"Category {oid}", match_type, rng.choice((None, 0, 1, 2))))
+                matcher = RuleMatcher(rules)
+                for _ in range(50):
+                    description = self.text(rng, 8)
+                    if rules and rng.random() < 0.2:
+                        description = rng.choice(rules)[2]
+                    self.assertEqual(matcher.match(description), brute_force(rules, description), repr(description))
+                self.assertEqual(matcher.match(None), brute_force(rules, None))
+    
+    def test_tie_break(self):
+        rules = [
+            (1, 'rule', 'COFFEE SHOP', 'Exact', 'exact', 0),
+            (2, 'rule', 'coffee', 'Prefix', 'prefix', 0),
+            (3, 'rule', 'shop', 'Contains', 'contains', 0),
+            (4, 'rule', 'c.*p', 'Regex', 'regex', 0),
+        ]
+        self.assertEqual(RuleMatcher(rules).match('COFFEE SHOP'), 'Exact')
+        self.assertEqual(RuleMatcher(rules[1:]).match('COFFEE SHOP'), 'Prefix')
+        self.assertEqual(RuleMatcher(rules[2:]).match('COFFEE SHOP'), 'Contains')
+        # Priority beats specificity, and the newest rule breaks a tie.
+        self.assertEqual(RuleMatcher(rules + [(5, 'rule', 'x|shop', 'Urgent', 'regex', 1)]).match('COFFEE SHOP'), 'Urgent')
+        self.assertEqual(RuleMatcher(rules + [(5, 'rule', 'shop', 'Newer', 'contains', 0)]).match('a shop'), 'Newer')
+    
+    def test_invalid_rules_are_skipped(self):
+        rules = [
+            (1, 'rule', '(', 'Broken', 'regex', 9),
+            (2, 'rule', '', 'Empty', 'contains', 9),
+            (3, 'rule', 'shop', 'Unknown', 'fuzzy', 9),
+            (4, 'rule', 'SHOP', 'Shop', 'contains', 0),
+        ]
+        matcher = RuleMatcher(rules)
+        self.assertEqual(matcher.match('a (shop'), 'Shop')
+        self.assertIsNone(matcher.match('other'))
+        self.assertFalse(RuleMatcher(rules[:3]))
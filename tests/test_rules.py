@@ -0,0 +1,104 @@
+import random
+import database as db
+from statement_import import auto_apply_rules
+from tests.helpers import DatabaseTestCase
+
+DESCRIPTIONS = tuple('ABCDEFG')
+ROW_CATEGORIES = ('Please Select',) * 3 + ('Income', 'Fuel', 'Delete')
+RULE_CATEGORIES = ('Income', 'Fuel', 'Delete', 'Rates and Taxes')
+
+
+def reference_pass(rows, rules):
+    """One pass of the original per-row, per-rule loop over (id,
+    description, category) rows with exact rules (pattern, category): for
+    each row as it was when the pass started, a 'Delete' row removes every
+    row with its description, and an uncategorized row gives every row with
+    its description the category of the last matching rule."""
+    if not rules:
+        return rows
+    rows = list(rows)
+    for _, description, category in list(rows):
+        if category == 'Delete':
+            rows = [row for row in rows if row[1] != description]
+        elif category == 'Please Select':
+            for pattern, rule_category in rules:
+                if pattern == description:
+                    rows = [
+                        (oid, text, rule_category if text == description else old)
+                        for oid, text, old in rows
+                    ]
+    return rows
+
+
+class SetBasedRulesTest(DatabaseTestCase):
+    """apply_category_rules against the original nested loop."""
+    
+    def test_matches_original_loop(self):
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                account_name = f"acc{seed}"
+                db.add_bank_account(account_name)
+                for _ in range(rng.randint(0, 30)):
+                    db.add_transaction(account_name, '2024-01-01', rng.choice(DESCRIPTIONS), '1.00', rng.choice(ROW_CATEGORIES))
+                
+                for rule in db.get_category_rules():
+                    db.delete_category_rule(rule[0])
+                rules = [(rng.choice(DESCRIPTIONS), rng.choice(RULE_CATEGORIES)) for _ in range(rng.randint(0, 6))]
+                for pattern, category in rules:
+                    db.add_category_rule('rule', pattern, category)
+                
+                expected = self.rows(account_name)
+                for _ in range(2):
+                    expected = reference_pass(expected, rules)
+                    auto_apply_rules(account_name)
+                    self.assertEqual(self.rows(account_name), expected)
+
+
+class IncrementalRulesTest(DatabaseTestCase):
+    """Passes that only look at flagged rows, or rescan after a rule
+    change, give the same rows as a full rescan every time."""
+    
+    def test_matches_full_rescan(self):
+        for seed in range(60):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                account_name = f"acc{seed}"
+                db.add_bank_account(account_name)
+                for rule in db.get_category_rules():
+                    db.delete_category_rule(rule[0])
+                rules = {}
+                
+                for step in range(25):
+                    op = rng.random()
+                    if op < 0.25:
+                        db.add_transactions(account_name, [
+                            (f"2024-01-{step + 1:02d}", rng.choice(DESCRIPTIONS), f"{i}.00")
+                            for i in range(rng.randint(1, 4))
+                        ])
+                    elif op < 0.35:
+                        db.add_transaction(account_name, '2024-02-01', rng.choice(DESCRIPTIONS), '1.00', rng.choice(ROW_CATEGORIES))
+                    elif op < 0.5:
+                        ids = [row[0] for row in self.rows(account_name)]
+                        if ids:
+                            db.update_transaction(
+                                account_name, '2024-02-01', rng.choice(DESCRIPTIONS), '1.00',
+                                rng.choice(ROW_CATEGORIES), rng.choice(ids)
+                            )
+                    elif op < 0.6:
+                        pattern, category = rng.choice(DESCRIPTIONS), rng.choice(RULE_CATEGORIES)
+                        db.add_category_rule('rule', pattern, category)
+                        rules[db.get_category_rules()[-1][0]] = (pattern, category)
+                    elif op < 0.65 and rules:
+                        oid = rng.choice(list(rules))
+                        pattern, category = rng.choice(DESCRIPTIONS), rng.choice(RULE_CATEGORIES)
+                        db.update_category_rule('rule', pattern, category, oid)
+                        rules[oid] = (pattern, category)
+                    elif op < 0.7 and rules:
+                        oid = rng.choice(list(rules))
+                        db.delete_category_rule(oid)
+                        del rules[oid]
+                    else:
+                        expected = reference_pass(self.rows(account_name), [rules[oid] for oid in sorted(rules)])
+                        auto_apply_rules(account_name)
+                        self.assertEqual(self.rows(account_name), expected, f"step {step}")
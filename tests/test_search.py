@@ -0,0 +1,20 @@
+from unittest import mock
+import database as db
+from tests.helpers import DatabaseTestCase
+
+
+class SearchLimitTest(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        db.add_bank_account('cheque')
+        db.add_transactions('cheque', [(f"202403{day:02d}", f"COFFEE {day}", "-3.50") for day in range(1, 31)])
+        db.add_transactions('cheque', [("20240301", "RENT", "-900.00")])
+    
+    def test_ranking_is_capped_but_the_total_is_not(self):
+        with mock.patch.object(db, 'SEARCH_LIMIT', 10):
+            hits = db.search_transactions('coffee', 'cheque', limit=100)
+            self.assertEqual(len(hits), 10)
+            self.assertEqual(db.count_search_results('coffee', 'cheque'), 10)
+            self.assertEqual(db.count_transactions('cheque', {'text': 'coffee'}), 30)
+            self.assertEqual(sorted(row[3] for row in hits), sorted(f"COFFEE {day}" for day in range(21, 31)))
+            self.assertEqual(db.count_search_results('rent', 'cheque'), 1)
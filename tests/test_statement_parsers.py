@@ -0,0 +1,46 @@
+import os
+import database as db
+from statement_import import import_statement_file
+from statement_parsers import read_csv
+from tests.helpers import DatabaseTestCase
+
+COLUMNS = (0, 1, 2)
+
+
+class ReadCsvTest(DatabaseTestCase):
+    def write(self, name, data):
+        path = os.path.join(self.folder, name)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        return path
+    
+    def test_cp1252_export(self):
+        path = self.write('cp1252.csv', b'Date,Description,Amount\r\n20240301,CAF\xc9 ROYAL,-12.5\r\n20240302,Na\xefve \x80 shop,3\r\n')
+        self.assertEqual(list(read_csv(path, *COLUMNS)), [
+            ['20240301', 'CAFÉ ROYAL', '-12.50'],
+            ['20240302', 'Naïve € shop', '3.00'],
+        ])
+    
+    def test_utf8_export(self):
+        path = self.write('utf8.csv', '﻿Date,Description,Amount\n20240301,CAFÉ €,1\n'.encode('utf-8'))
+        self.assertEqual(list(read_csv(path, *COLUMNS)), [['20240301', 'CAFÉ €', '1.00']])
+    
+    def test_rows_without_an_amount_are_skipped(self):
+        path = self.write('blank.csv', b'Date,Description,Amount\n20240301,Shop,-5\n20240302,Pending,\n20240303,Typo,12,5\n20240304,Bad,abc\n20240305,Pay,100\n')
+        self.assertEqual([row[2] for row in read_csv(path, *COLUMNS)], ['-5.00', None, '12.00', None, '100.00'])
+        
+        db.add_bank_account('cheque')
+        self.assertEqual(import_statement_file('cheque', path, COLUMNS), (3, 2))
+        self.assertEqual([row[1] for row in self.rows('cheque')], ['Shop', 'Typo', 'Pay'])
+    
+    def test_short_rows_are_skipped(self):
+        path = self.write('footer.csv', b'Date,Description,Amount\n20240301,Shop,-5\n20240302,Pay\nEnd of statement\n')
+        self.assertEqual(list(read_csv(path, *COLUMNS)), [
+            ['20240301', 'Shop', '-5.00'],
+            ['20240302', 'Pay', None],
+            ['End of statement', '', None],
+        ])
+        
+        db.add_bank_account('cheque')
+        self.assertEqual(import_statement_file('cheque', path, COLUMNS), (1, 2))
+        self.assertEqual([row[1] for row in self.rows('cheque')], ['Shop'])
@@ -0,0 +1,66 @@
+import random
+import database as db
+from tests.helpers import DatabaseTestCase
+
+
+def reference_summary():
+    """The Budget Summary as Accounts.calculate_totals built it in Python
+    before it moved into SQL."""
+    transactions = db.execute_query("SELECT amount, category FROM transactions", fetch=True)
+    if not transactions:
+        return []
+    
+    totals = {'Please Select': [0, 'None']}
+    for category, budget in db.get_all_categories_with_budget():
+        totals.setdefault(category, [0, budget])
+    for amount, category in transactions:
+        totals.setdefault(category, [0, 'None'])
+        if isinstance(amount, int):
+            totals[category][0] += abs(amount) if category == 'Please Select' else amount
+    totals['Uncategorized'] = totals.pop('Please Select')
+    return [(name, round(total / 100, 6), budget) for name, (total, budget) in sorted(totals.items())]
+
+
+class CategorySummaryTest(DatabaseTestCase):
+    
+    def test_matches_python_totals(self):
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                self.new_database(f"seed{seed}.db")
+                for _ in range(rng.randint(0, 3)):
+                    db.add_category(rng.choice(['Fuel', 'Food', 'Zed', 'Income']), rng.choice(['None', '100']))
+                db.add_bank_account('a')
+                db.add_bank_account('b')
+                for _ in range(rng.randint(0, 40)):
+                    db.add_transaction(
+                        rng.choice('ab'), '2024-01-01', 'x',
+                        rng.choice([f"{rng.uniform(-99, 99):.2f}", 'abc']),
+                        rng.choice(['Please Select', 'Fuel', 'Income', 'Other', 'Delete'])
+                    )
+                
+                for _ in range(rng.randint(0, 10)):
+                    row = db.execute_query(
+                        """SELECT transactions.id, account FROM transactions
+                        JOIN bankAccountNames ON bankAccountNames.id = accountId LIMIT 1""",
+                        fetchone=True
+                    )
+                    if row is None:
+                        break
+                    oid, account_name = row
+                    op = rng.random()
+                    if op < 0.4:
+                        db.update_transaction(
+                            account_name, '2024-01-01', 'x', rng.choice(['1.00', '-2.00', 'zz']),
+                            rng.choice(['Please Select', 'Fuel', 'New']), oid
+                        )
+                    elif op < 0.8:
+                        db.delete_transaction(account_name, oid)
+                    elif op < 0.9:
+                        db.delete_bank_account('b')
+                    else:
+                        db.execute_query("UPDATE transactions SET category = 'Fuel'")
+                
+                self.assertEqual(db.check_category_totals(), [])
+                summary = [(name, round(total, 6), budget) for name, total, budget in db.get_category_summary()]
+                self.assertEqual(summary, reference_summary())
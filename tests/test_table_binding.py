@@ -0,0 +1,130 @@
+import random
+import unittest
+from theme import TableBinding, VirtualTable
+
+
+class RecordingTree:
+    """The Treeview calls TableBinding makes, applied to a list and counted."""
+    
+    def __init__(self):
+        self.order = []
+        self.items = {}
+        self.calls = 0
+    
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        self.calls += 1
+        assert iid not in self.items
+        self.order.insert(index, iid)
+        self.items[iid] = (values, tags)
+    
+    def item(self, iid, values=(), tags=()):
+        self.calls += 1
+        self.items[iid] = (values, tags)
+    
+    def move(self, iid, parent, index):
+        self.calls += 1
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+    
+    def delete(self, *iids):
+        self.calls += 1
+        for iid in iids:
+            self.order.remove(iid)
+            del self.items[iid]
+    
+    def bind(self, sequence, func):
+        pass
+    
+    def yview_moveto(self, fraction):
+        pass
+
+
+class RecordingScrollbar:
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+class TableBindingTest(unittest.TestCase):
+    
+    def test_random_edits(self):
+        rng = random.Random(0)
+        tree = RecordingTree()
+        binding = TableBinding(tree)
+        rows = [(i, f"v{i}") for i in range(50)]
+        
+        for trial in range(500):
+            rows = list(rows)
+            op = rng.random()
+            if op < 0.3 and rows:
+                rows.pop(rng.randrange(len(rows)))
+            elif op < 0.6:
+                rows.insert(rng.randrange(len(rows) + 1), (1000 + trial, 'new'))
+            elif op < 0.8 and rows:
+                i = rng.randrange(len(rows))
+                rows[i] = (rows[i][0], f"changed{trial}")
+            else:
+                rng.shuffle(rows)
+            start = rng.choice([0, 0, 3])
+            
+            binding.render(rows, start=start)
+            self.assertEqual(tree.order, [str(row[0]) for row in rows])
+            for i, row in enumerate(rows, start=start):
+                self.assertEqual(tree.items[str(row[0])], (row, ('evenrow' if i % 2 == 0 else 'oddrow',)))
+        
+        binding.clear()
+        self.assertEqual(tree.order, [])
+    
+    def test_single_edit_is_one_call(self):
+        tree = RecordingTree()
+        binding = TableBinding(tree)
+        rows = [(i, 'x') for i in range(1000)]
+        binding.render(rows)
+        
+        rows[500] = (500, 'y')
+        tree.calls = 0
+        binding.render(rows)
+        self.assertEqual(tree.calls, 1)
+        
+        tree.calls = 0
+        binding.render(rows)
+        self.assertEqual(tree.calls, 0)
+
+
+class VirtualTableTest(unittest.TestCase):
+    
+    def test_scrolling(self):
+        rows = [(i, f"row {i}") for i in range(1000)]
+        fetches = []
+        
+        def fetch_rows(after, limit, offset):
+            fetches.append((after, offset))
+            start = offset if after is None else after + 1
+            return rows[start:start + limit]
+        
+        tree = RecordingTree()
+        scrollbar = RecordingScrollbar()
+        table = VirtualTable(tree, scrollbar, lambda: len(rows), fetch_rows, page_size=50, cached_pages=2)
+        table.refresh()
+        self.assertEqual(tree.order, [str(i) for i in range(20)])
+        
+        # Reading down page by page continues from the previous page's key.
+        for first in range(20, 400, 20):
+            table.scroll(20)
+            self.assertEqual(tree.order, [str(i) for i in range(first, first + 20)])
+        self.assertEqual(fetches, [(None, 0)] + [(offset - 1, offset) for offset in range(50, 400, 50)])
+        
+        rng = random.Random(0)
+        for trial in range(200):
+            if rng.random() < 0.5:
+                table._on_scrollbar('moveto', str(rng.random()))
+            else:
+                table.scroll(rng.randint(-100, 100))
+            first = table._first
+            self.assertTrue(0 <= first <= len(rows) - 20)
+            self.assertEqual(tree.order, [str(i) for i in range(first, first + 20)])
+            self.assertEqual(scrollbar.position, (first / len(rows), (first + 20) / len(rows)))
+        
+        del rows[10:]
+        table.refresh()
+        self.assertEqual(tree.order, [str(i) for i in range(10)])
+        self.assertEqual(scrollbar.position, (0, 1))
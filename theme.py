@@ -1,3 +1,5 @@
+import math
+from collections import OrderedDict
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 
@@ -27,9 +29,11 @@ def configure_treeview_style(style):
         font=('Segoe UI', 10, 'bold'),
     )
     
-def create_styled_treeview(parent, columns, column_widths, show_scrollbar=True):
-    frame = ttk.Frame(parent)
-    
+def build_styled_treeview(frame, columns, column_widths, scroll_command=None, show_scrollbar=True):
+    """Pack the app's styled Treeview and its scrollbar into frame. Returns
+    (tree, scrollbar), scrollbar None without show_scrollbar. By default the
+    scrollbar follows the tree's own view; with scroll_command it calls that
+    instead and the caller sets its position."""
     tree = ttk.Treeview(
         frame, 
         columns=columns,
@@ -42,9 +46,11 @@ def create_styled_treeview(parent, columns, column_widths, show_scrollbar=True):
         tree.heading(col, text=col, anchor=W)
         tree.column(col, width=width, anchor=W)
     
+    scrollbar = None
     if show_scrollbar:
-        scrollbar = ttk.Scrollbar(frame, orient=VERTICAL, command=tree.yview, bootstyle="dark-round")
-        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar = ttk.Scrollbar(frame, orient=VERTICAL, command=scroll_command or tree.yview, bootstyle="dark-round")
+        if scroll_command is None:
+            tree.configure(yscrollcommand=scrollbar.set)
         scrollbar.pack(side=RIGHT, fill=Y)
     
     tree.pack(side=LEFT, fill=BOTH, expand=True)
@@ -52,8 +58,218 @@ def create_styled_treeview(parent, columns, column_widths, show_scrollbar=True):
     tree.tag_configure('oddrow', background='#1a1d21')
     tree.tag_configure('evenrow', background='#252830')
     
+    return tree, scrollbar
+
+def create_styled_treeview(parent, columns, column_widths, show_scrollbar=True):
+    frame = ttk.Frame(parent)
+    tree, scrollbar = build_styled_treeview(frame, columns, column_widths, show_scrollbar=show_scrollbar)
     return frame, tree
 
+class TableBinding:
+    """Keeps a Treeview in step with a list of rows.
+    
+    Items are keyed by key(row), the rowid by default, and each render() is
+    diffed against the previous one so only new, changed, moved and removed
+    rows touch the Treeview. Scroll position and selection survive because
+    unchanged items are never deleted. row_tags(index, row) overrides the
+    default odd/even striping."""
+    
+    def __init__(self, tree, row_values=None, key=None, row_tags=None):
+        self.tree = tree
+        self.row_values = row_values or (lambda row: row)
+        self.key = key or (lambda row: row[0])
+        self.row_tags = row_tags or (lambda i, row: ('evenrow' if i % 2 == 0 else 'oddrow',))
+        self._items = {}
+        self._order = []
+    
+    def render(self, rows, start=0):
+        items = []
+        for i, row in enumerate(rows, start=start):
+            items.append((str(self.key(row)), (tuple(self.row_values(row)), tuple(self.row_tags(i, row)))))
+        new_order = [iid for iid, _ in items]
+        keep = set(new_order)
+        
+        stale = [iid for iid in self._order if iid not in keep]
+        if stale:
+            self.tree.delete(*stale)
+        
+        kept = [iid for iid in self._order if iid in keep]
+        moved = kept != [iid for iid in new_order if iid in self._items]
+        
+        for index, (iid, item) in enumerate(items):
+            values, tags = item
+            old = self._items.get(iid)
+            if old is None:
+                self.tree.insert('', index, iid=iid, values=values, tags=tags)
+                continue
+            if old != item:
+                self.tree.item(iid, values=values, tags=tags)
+            if moved:
+                self.tree.move(iid, '', index)
+        
+        self._items = dict(items)
+        self._order = new_order
+    
+    def clear(self):
+        if self._order:
+            self.tree.delete(*self._order)
+        self._items = {}
+        self._order = []
+
+class VirtualTable:
+    """Pages a large table through a Treeview that only holds the rows in
+    view.
+    
+    count_rows() returns the total number of rows. fetch_rows(after, limit,
+    offset) returns up to `limit` rows following the row whose key is
+    `after` (keyset pagination), or starting at `offset` when no
+    neighbouring key is known; offset is always the page's position, so
+    sources that cannot page by key may ignore `after`. Fetched pages are
+    kept in a small cache so scrolling only goes back to the database at
+    page boundaries. row_values(row) gives the displayed values;
+    row_key(row) gives the keyset key, and row[0] becomes the item id. Rows
+    are drawn through a TableBinding, so scrolling and refreshing only
+    touch the items that changed.
+    
+    tree and scrollbar are the widgets to draw into; anything with the same
+    methods will do, which is how the benchmarks run without a display."""
+    
+    def __init__(self, tree, scrollbar, count_rows, fetch_rows,
+                 row_values=None, row_key=None, page_size=200, cached_pages=4):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.count_rows = count_rows
+        self.fetch_rows = fetch_rows
+        self.row_values = row_values or (lambda row: row)
+        self.row_key = row_key or (lambda row: row[0])
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        
+        self._pages = OrderedDict()
+        self._total = 0
+        self._first = 0
+        self._visible = 20
+        
+        self.binding = TableBinding(self.tree, row_values=self.row_values)
+        
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<Prior>', lambda e: self.scroll(-self._visible))
+        self.tree.bind('<Next>', lambda e: self.scroll(self._visible))
+        self.tree.bind('<Up>', lambda e: self._on_arrow(-1))
+        self.tree.bind('<Down>', lambda e: self._on_arrow(1))
+    
+    def refresh(self, top=False):
+        """Re-count and re-fetch from the data source, keeping the position
+        unless top is set."""
+        self._pages.clear()
+        if top:
+            self._first = 0
+        self._total = self.count_rows()
+        self._render()
+    
+    def release(self):
+        """Drop cached rows and items; the next refresh() fetches again."""
+        self._pages.clear()
+        self.binding.clear()
+    
+    def scroll(self, rows):
+        self._first += rows
+        self._render()
+        return 'break'
+    
+    def _page(self, index):
+        if index in self._pages:
+            self._pages.move_to_end(index)
+            return self._pages[index]
+        
+        previous = self._pages.get(index - 1)
+        if previous:
+            rows = self.fetch_rows(self.row_key(previous[-1]), self.page_size, index * self.page_size)
+        else:
+            rows = self.fetch_rows(None, self.page_size, index * self.page_size)
+        
+        self._pages[index] = rows
+        while len(self._pages) > self.cached_pages:
+            self._pages.popitem(last=False)
+        return rows
+    
+    def _rows(self, start, count):
+        rows = []
+        index = start
+        while len(rows) < count and index < self._total:
+            page = self._page(index // self.page_size)
+            offset = index % self.page_size
+            chunk = page[offset:offset + count - len(rows)]
+            if not chunk:
+                break
+            rows.extend(chunk)
+            index += len(chunk)
+        return rows
+    
+    def _render(self):
+        self._first = max(0, min(self._first, self._total - self._visible))
+        rows = self._rows(self._first, self._visible)
+        
+        self.binding.render(rows, start=self._first)
+        
+        self.tree.yview_moveto(0)
+        if self._total:
+            self.scrollbar.set(self._first / self._total, (self._first + len(rows)) / self._total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == 'moveto':
+            self._first = int(float(amount) * self._total)
+            self._render()
+        elif unit == 'pages':
+            self.scroll(int(amount) * self._visible)
+        else:
+            self.scroll(int(amount))
+    
+    def _on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+    
+    def _on_arrow(self, step):
+        children = self.tree.get_children()
+        focused = self.tree.focus()
+        if not children or focused not in children:
+            return None
+        
+        index = children.index(focused) + step
+        if 0 <= index < len(children):
+            return None
+        
+        self.scroll(step)
+        children = self.tree.get_children()
+        if children:
+            edge = children[0] if step < 0 else children[-1]
+            self.tree.selection_set(edge)
+            self.tree.focus(edge)
+        return 'break'
+    
+    def _on_resize(self, event):
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 30)
+        visible = max(1, math.ceil(event.height / row_height) - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+class VirtualTreeview(VirtualTable, ttk.Frame):
+    """VirtualTable in a frame with the app's styled Treeview and a
+    scrollbar."""
+    
+    def __init__(self, parent, columns, column_widths, count_rows, fetch_rows, **kwargs):
+        ttk.Frame.__init__(self, parent)
+        tree, scrollbar = build_styled_treeview(self, columns, column_widths, scroll_command=self._on_scrollbar)
+        VirtualTable.__init__(self, tree, scrollbar, count_rows, fetch_rows, **kwargs)
+
+def create_virtual_treeview(parent, columns, column_widths, count_rows, fetch_rows, **kwargs):
+    return VirtualTreeview(parent, columns, column_widths, count_rows, fetch_rows, **kwargs)
+
 def create_button(parent, text, command, bootstyle="primary", **kwargs):
     return ttk.Button(
         parent,